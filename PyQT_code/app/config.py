@@ -13,6 +13,15 @@ MAIN_BACKGROUND_COLOR = "#17161A"
 NAV_BAR_COLOR = "#1F1E24"
 WIDGET_BACKGROUND_COLOR = "#36363F"
 
+BACKEND_URL = "http://127.0.0.1:8000"
+TELEMETRY_WS_URL = "ws://127.0.0.1:8000/ws/telemetry"
+VEHICLE_ID = os.getenv("VEHICLE_ID", "head-unit-1")
+ROUTE_SIMPLIFY_TOLERANCE_M = 5  # Douglas-Peucker tolerance for drawn routes
+ROUTE_POLYLINE_PRECISION = 6  # OSRM polyline6
+SIMULATION_TIME_SCALE = 10  # simulated seconds of driving per 1 s simulation tick
+ROUTE_VIA_BACKEND = os.getenv("ROUTE_VIA_BACKEND", "0") == "1"  # use /api/route (ORS or offline graph) instead of public OSRM
+GEOCODE_VIA_BACKEND = os.getenv("GEOCODE_VIA_BACKEND", "0") == "1"  # use /api/geocode (local places index) instead of Nominatim
+
 DEFAULT_PLAYLIST_URL = "https://music.youtube.com/playlist?list=RDCLAK5uy_kpxnNxJpPZjLKbL9WgvrPuErWkUxMP6x4"
 
 NAV_BUTTONS_CONFIG = {
@@ -7,9 +7,15 @@ from PyQt6.QtWebEngineWidgets import QWebEngineView
 from PyQt6.QtWebEngineCore import QWebEngineSettings, QWebEnginePage
 from PyQt6.QtCore import QUrl, QObject, pyqtSlot, QTimer, QThread, pyqtSignal
 from PyQt6.QtWebChannel import QWebChannel
+from PyQt6.QtWebSockets import QWebSocket
+from PyQt6.QtNetwork import QAbstractSocket
 
 from .. import config
 from ..vehicle_state import vehicle_state
+from backend.services.simplify import simplify_coords
+from backend.services import polyline
+from backend.services.energy_model import build_profile
+from backend.config import LOW_BATTERY_THRESHOLD
 
 # --- Worker for background network tasks ---
 class MapWorker(QObject):
@@ -20,13 +26,20 @@ class MapWorker(QObject):
     @pyqtSlot(str, dict, str)
     def perform_search(self, query, live_location, search_type):
         try:
-            base_url = "https://nominatim.openstreetmap.org/search"
-            params = {'q': query, 'format': 'json', 'limit': 1}
-            if live_location:
-                l = live_location
-                params['viewbox'] = f"{l['lng']-1},{l['lat']+1},{l['lng']+1},{l['lat']-1}"
-                params['bounded'] = 1
-            response = requests.get(base_url, params=params, headers={'User-Agent': 'TataEVApp/1.0'}, timeout=10)
+            if config.GEOCODE_VIA_BACKEND:
+                # Same result shape as Nominatim, ranked towards the live location.
+                params = {'q': query, 'limit': 1}
+                if live_location:
+                    params.update(lat=live_location['lat'], lng=live_location['lng'])
+                response = requests.get(f"{config.BACKEND_URL}/api/geocode/", params=params, timeout=10)
+            else:
+                base_url = "https://nominatim.openstreetmap.org/search"
+                params = {'q': query, 'format': 'json', 'limit': 1}
+                if live_location:
+                    l = live_location
+                    params['viewbox'] = f"{l['lng']-1},{l['lat']+1},{l['lng']+1},{l['lat']-1}"
+                    params['bounded'] = 1
+                response = requests.get(base_url, params=params, headers={'User-Agent': 'TataEVApp/1.0'}, timeout=10)
             response.raise_for_status()
             locations = response.json()
             if locations:
@@ -39,11 +52,16 @@ class MapWorker(QObject):
     @pyqtSlot(list, list)
     def get_route(self, start_coords, end_coords):
         try:
-            url = f"http://router.project-osrm.org/route/v1/driving/{start_coords[0]},{start_coords[1]};{end_coords[0]},{end_coords[1]}?overview=full&geometries=geojson"
-            response = requests.get(url, timeout=10)
+            if config.ROUTE_VIA_BACKEND:
+                # The backend serves ORS or its offline engine; it expects [lat, lng] pairs.
+                body = {'start': start_coords[::-1], 'end': end_coords[::-1]}
+                response = requests.post(f"{config.BACKEND_URL}/api/route/", json=body, timeout=10)
+            else:
+                url = f"http://router.project-osrm.org/route/v1/driving/{start_coords[0]},{start_coords[1]};{end_coords[0]},{end_coords[1]}?overview=full&geometries=polyline6"
+                response = requests.get(url, timeout=10)
             response.raise_for_status()
             route_data = response.json()
-            if route_data.get('code') == 'Ok':
+            if route_data.get('routes') and route_data.get('code', 'Ok') == 'Ok':
                 self.route_result.emit(route_data)
             else:
                 self.error.emit("Could not find a route.")
@@ -74,11 +92,13 @@ class MapView(QWidget):
         self._setup_ui()
         self._setup_worker_thread()
         self._setup_bridge_and_load()
+        self._setup_telemetry()
         self._connect_signals()
 
     def _setup_state_and_timers(self):
         self.start_location, self.destination_location, self.live_location = None, None, None
         self.route_coordinates, self.simulation_index = [], 0
+        self.energy_profile, self.soc_curve, self.low_battery_index, self.simulation_elapsed_s = None, None, None, 0.0
         self.simulation_timer = QTimer(self)
         self.simulation_timer.setInterval(1000)
 
@@ -147,6 +167,33 @@ class MapView(QWidget):
         map_path = config.get_asset_path("map.html")
         self.web_view.setUrl(QUrl.fromLocalFile(map_path))
 
+    def _setup_telemetry(self):
+        # One persistent socket to the backend instead of an HTTP POST per fix
+        self.telemetry_socket = QWebSocket()
+        self.telemetry_socket.textMessageReceived.connect(self._on_telemetry_message)
+        self.telemetry_socket.connected.connect(self._on_telemetry_connected)
+        # A failed open only reports an error, so retry on both; the single timer collapses the two into one retry.
+        self.telemetry_socket.disconnected.connect(self._schedule_telemetry_reconnect)
+        self.telemetry_socket.errorOccurred.connect(self._schedule_telemetry_reconnect)
+        self.telemetry_retry_ms = 1000  # Reconnect backoff, doubled up to 30 s
+        self.telemetry_retry_timer = QTimer(self)
+        self.telemetry_retry_timer.setSingleShot(True)
+        self.telemetry_retry_timer.timeout.connect(self._connect_telemetry)
+        self._connect_telemetry()
+
+    def _connect_telemetry(self):
+        if self.telemetry_socket.state() == QAbstractSocket.SocketState.UnconnectedState:
+            self.telemetry_socket.open(QUrl(config.TELEMETRY_WS_URL))
+
+    def _on_telemetry_connected(self):
+        self.telemetry_retry_ms = 1000
+
+    def _schedule_telemetry_reconnect(self, *_):
+        if self.telemetry_retry_timer.isActive():
+            return
+        self.telemetry_retry_timer.start(self.telemetry_retry_ms)
+        self.telemetry_retry_ms = min(self.telemetry_retry_ms * 2, 30000)
+
     def _connect_signals(self):
         self.use_custom_start_checkbox.toggled.connect(self.start_input_container.setVisible)
         self.start_search_button.clicked.connect(lambda: self.search_requested.emit(self.start_input.text(), self.live_location, "start"))
@@ -177,10 +224,15 @@ class MapView(QWidget):
 
     @pyqtSlot(dict)
     def _on_route_result(self, route_data):
-        geometry = json.dumps(route_data['routes'][0]['geometry'])
-        self.route_coordinates = route_data['routes'][0]['geometry']['coordinates']
-        self._run_js(f"mapApi.drawRoute({geometry});")
-        self.update_status_label("Route drawn on map.", "success")
+        # The simulation walks the full geometry; the map only needs the simplified line, sent as an encoded polyline
+        precision = route_data.get('geometryPrecision', config.ROUTE_POLYLINE_PRECISION)
+        self.route_coordinates = polyline.decode(route_data['routes'][0]['geometry'], precision)
+        encoded = polyline.encode(simplify_coords(self.route_coordinates, config.ROUTE_SIMPLIFY_TOLERANCE_M), precision)
+        self._run_js(f"mapApi.drawEncodedRoute({json.dumps(encoded)}, {precision});")
+        # One vectorised pass over the whole route; the simulation only indexes into it.
+        self.energy_profile = build_profile(self.route_coordinates)
+        arrival = self.energy_profile.soc(vehicle_state.get_battery_percentage())[-1]
+        self.update_status_label(f"Route drawn: {self.energy_profile.distance_km[-1]:.1f} km, arrival ~{arrival:.0f}%", "success")
         
     def _draw_route(self):
         start_loc = self.start_location if self.use_custom_start_checkbox.isChecked() else self.live_location
@@ -189,6 +241,7 @@ class MapView(QWidget):
 
     def clear_map(self):
         self.start_location, self.destination_location, self.route_coordinates, self.simulation_index = None, None, [], 0
+        self.energy_profile, self.soc_curve, self.low_battery_index = None, None, None
         self.dest_input.clear(); self.start_input.clear()
         if self.simulation_timer.isActive(): self._toggle_simulation(False)
         self._run_js("mapApi.clearMap()")
@@ -198,17 +251,27 @@ class MapView(QWidget):
         if checked:
             if not self.route_coordinates:
                 self.update_status_label("Draw a route to start.", "error"); self.simulate_button.setChecked(False); return
-            self.simulation_index = 0; self.simulation_timer.start(); self.simulate_button.setText("Stop Simulation")
+            self.soc_curve = self.energy_profile.soc(vehicle_state.get_battery_percentage())
+            self.low_battery_index = self.energy_profile.first_below(self.soc_curve, LOW_BATTERY_THRESHOLD)
+            self.simulation_index, self.simulation_elapsed_s = 0, 0.0
+            self.simulation_timer.start(); self.simulate_button.setText("Stop Simulation")
         else:
             self.simulation_timer.stop(); self.simulate_button.setText("Start Simulation")
 
     def _simulate_step(self):
-        if self.simulation_index >= len(self.route_coordinates):
+        if self.simulation_index >= len(self.route_coordinates) - 1:
+            vehicle_state.set_speed(0.0)
             self._toggle_simulation(False); self.update_status_label("Simulation finished.", "success"); return
-        lng, lat = self.route_coordinates[self.simulation_index]
+        # Position, speed and battery all come from the precomputed energy profile.
+        self.simulation_elapsed_s += config.SIMULATION_TIME_SCALE
+        self.simulation_index = max(self.simulation_index, min(self.energy_profile.index_at(self.simulation_elapsed_s), len(self.route_coordinates) - 1))
+        i = self.simulation_index
+        lng, lat = self.route_coordinates[i]
         self._run_js(f"mapApi.updateUserPosition({lat}, {lng});")
-        vehicle_state.set_speed(45.0); new_battery = max(0, vehicle_state.get_battery_percentage() - 0.1); vehicle_state.set_battery_percentage(round(new_battery, 1))
-        self.simulation_index = min(self.simulation_index + 5, len(self.route_coordinates))
+        vehicle_state.set_speed(round(float(self.energy_profile.speed_kmh[i]), 1)); vehicle_state.set_battery_percentage(round(float(self.soc_curve[i]), 1))
+        if self.low_battery_index is not None and i >= self.low_battery_index:
+            self.low_battery_index = None
+            self.update_status_label(f"Battery below {LOW_BATTERY_THRESHOLD}%, ~{self.soc_curve[-1]:.0f}% predicted at arrival", "error")
 
     def update_status_label(self, message, msg_type):
         color = "#66FF66" if msg_type == "success" else "#FF6666" if msg_type == "error" else "white"
@@ -220,12 +283,23 @@ class MapView(QWidget):
             
     def update_backend(self):
         if not self.live_location: return
+        payload = {"lat": self.live_location['lat'], "lng": self.live_location['lng'], "batteryLevel": round(vehicle_state.get_battery_percentage()),
+                   "vehicleId": config.VEHICLE_ID, "speed": vehicle_state.get_vehicle_speed()}
+        if self.telemetry_socket.state() == QAbstractSocket.SocketState.ConnectedState:
+            self.telemetry_socket.sendTextMessage(json.dumps(payload)); return
         try:
-            payload = {"lat": self.live_location['lat'], "lng": self.live_location['lng'], "batteryLevel": vehicle_state.get_battery_percentage()}
-            url = "http://127.0.0.1:8000/api/location/update"
-            requests.post(url, json=payload, timeout=5).raise_for_status()
+            url = f"{config.BACKEND_URL}/api/location/update"
+            response = requests.post(url, json=payload, timeout=5); response.raise_for_status()
+            self._on_telemetry_message(response.text)
         except Exception as e:
             print(f"ERROR: Backend update failed: {e}")
+
+    @pyqtSlot(str)
+    def _on_telemetry_message(self, message):
+        decision = json.loads(message)
+        if decision.get("redirectToChargingStation") and decision.get("station"):
+            station = decision["station"]
+            self.update_status_label(f"Low battery! Nearest charger: {station.get('name', '')[:30]}", "error")
             
     @pyqtSlot(float)
     def update_speed_label(self, speed): self.speed_label.setText(f"🚗 Speed: {speed:.1f} km/h")
@@ -1,21 +1,49 @@
+import asyncio
+from contextlib import asynccontextmanager
 from datetime import datetime
 import os
 from typing import Optional
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, JSONResponse
 from fastapi.staticfiles import StaticFiles
-import requests
-from bs4 import BeautifulSoup
 from pydantic import BaseModel, Field
 
 # Handle both relative and absolute imports
 try:
-    from .routes import location, route, charging
+    from .routes import location, route, charging, telemetry, fleet, history, metrics, geocode, tiles
+    from .services import http_client
+    from .services.write_behind import history_buffer
+    from .services.route_cache import load_route_cache, save_route_cache
+    from .services.weather_service import weather_cache
+    from .services.metrics import MetricsMiddleware
+    from .services.deadline import DeadlineMiddleware, DeadlineExceeded
+    from .services.warmup import warm_up
+    from .config import FRONTEND_DIR, STARTUP_WARMUP, REQUEST_BUDGET_S, LOCATION_BUDGET_S
 except ImportError:
-    from routes import location, route, charging
+    from routes import location, route, charging, telemetry, fleet, history, metrics, geocode, tiles
+    from services import http_client
+    from services.write_behind import history_buffer
+    from services.route_cache import load_route_cache, save_route_cache
+    from services.weather_service import weather_cache
+    from services.metrics import MetricsMiddleware
+    from services.deadline import DeadlineMiddleware, DeadlineExceeded
+    from services.warmup import warm_up
+    from config import FRONTEND_DIR, STARTUP_WARMUP, REQUEST_BUDGET_S, LOCATION_BUDGET_S
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app):
+    history_buffer.start()
+    load_route_cache()
+    warmup = asyncio.create_task(warm_up()) if STARTUP_WARMUP else None
+    yield
+    if warmup is not None:
+        warmup.cancel()
+    history_buffer.stop()
+    save_route_cache()
+    await http_client.close_client()
+
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -25,13 +53,35 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+app.add_middleware(DeadlineMiddleware, default_s=REQUEST_BUDGET_S, budgets={"/api/location": LOCATION_BUDGET_S})
+
+# Outermost, so the histogram covers CORS and routing as well as the handler.
+app.add_middleware(MetricsMiddleware, routers={
+    "/api/location": "location", "/api/route": "route", "/api/charging": "charging",
+    "/api/fleet": "fleet", "/api/history": "history", "/api/geocode": "geocode",
+    "/tiles": "tiles", "/get_weather_info": "weather", "/metrics": "metrics",
+})
+
+@app.exception_handler(DeadlineExceeded)
+async def deadline_exceeded(request, exc):
+    return JSONResponse(status_code=504, content={"detail": str(exc)})
+
+@app.exception_handler(http_client.CircuitOpen)
+async def circuit_open(request, exc):
+    return JSONResponse(status_code=503, content={"detail": str(exc)})
+
 app.include_router(location.router, prefix="/api/location")
 app.include_router(route.router, prefix="/api/route")
 app.include_router(charging.router, prefix="/api/charging")
+app.include_router(fleet.router, prefix="/api/fleet")
+app.include_router(history.router, prefix="/api/history")
+app.include_router(geocode.router, prefix="/api/geocode")
+app.include_router(tiles.router, prefix="/tiles")
+app.include_router(telemetry.router, prefix="/ws")
+app.include_router(metrics.router)
 
 # Absolute path to your frontend directory
-# frontend_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'frontend')
-frontend_dir = "C:\\Users\\madhu\\OneDrive\\Desktop\\hachathons\\Tata hackathon\\PyQT_code\\app\\assets"
+frontend_dir = FRONTEND_DIR
 
 # Mount the frontend directory as static files at /static
 app.mount("/static", StaticFiles(directory=frontend_dir), name="static")
@@ -43,16 +93,11 @@ async def serve_map():
 
 @app.get("/get_weather_info")
 async def get_weather_info(country: str = "India", city: str = "Delhi"):
-    URL = f"https://www.timeanddate.com/weather/{country}/{city}"   # sample request URL -> http://127.0.0.1:8000/get_weather_info?country=India&city=Delhi
-
-    response = requests.get(URL)
-    soup = BeautifulSoup(response.content, 'html.parser')
-
-    # Find temperature and weather description
-    temperature = soup.find("div", class_="h2").text.strip()
-    desc = soup.find("p").text.strip()
-
-    return {"temperature": temperature, "description": desc}
+    # sample request URL -> http://127.0.0.1:8000/get_weather_info?country=India&city=Delhi
+    try:
+        return await weather_cache.get(country, city)
+    except Exception as e:
+        raise HTTPException(status_code=502, detail=f"Weather lookup failed: {e}")
 
 
 class LocationUpdate(BaseModel):
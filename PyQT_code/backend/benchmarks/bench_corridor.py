@@ -0,0 +1,65 @@
+"""Chargers-along-route query: segment grid vs brute force.
+
+    python benchmarks/bench_corridor.py [route_km] [stations]
+
+Builds a synthetic national-scale station set and a wiggly route with a point
+every ~25 m, then times ChargerIndex.along_route against checking every
+station in the route's bounding box against every segment in NumPy chunks.
+"""
+import math
+import os
+import sys
+import time
+import numpy as np
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from services.charger_index import ChargerIndex
+from services.spatial_index import SegmentIndex
+
+BUFFER_KM = 2.0
+REPEAT = 5
+
+def synthetic_route(route_km):
+    n = int(route_km * 40)
+    t = np.linspace(0, 1, n)
+    lats = 12.9 + t * route_km / 111 * 0.8 + 0.2 * np.sin(t * 30)
+    lngs = 77.5 + t * route_km / 111 * 0.6 + 0.3 * np.cos(t * 17)
+    return np.column_stack((lngs, lats))
+
+def brute_force(index, coords):
+    # Same projected point-to-segment distance, without the grid.
+    segments = SegmentIndex(coords[:, 1], coords[:, 0], index.grid, BUFFER_KM)
+    margin = BUFFER_KM / 100
+    inside = np.flatnonzero((index.lats >= coords[:, 1].min() - margin) & (index.lats <= coords[:, 1].max() + margin)
+                            & (index.lngs >= coords[:, 0].min() - margin) & (index.lngs <= coords[:, 0].max() + margin))
+    hits = []
+    for start in range(0, len(inside), 256):
+        chunk = inside[start:start + 256]
+        lat, lng = index.lats[chunk, None], index.lngs[chunk, None]
+        px = (lng - segments.lng0) * segments._kx
+        py = (lat - segments.lat0) * 110.574
+        t = np.clip((px * segments._dx + py * segments._dy) / np.maximum(segments.length_km ** 2, 1e-12), 0, 1)
+        dist = np.hypot(px - t * segments._dx, py - t * segments._dy).min(axis=1)
+        hits.extend(chunk[dist <= BUFFER_KM])
+    return hits
+
+def main():
+    route_km = float(sys.argv[1]) if len(sys.argv) > 1 else 500
+    n = int(sys.argv[2]) if len(sys.argv) > 2 else 50_000
+    rng = np.random.default_rng(0)
+    index = ChargerIndex(rng.uniform(8, 32, n), rng.uniform(68, 90, n), np.arange(n), [""] * n)
+    coords = synthetic_route(route_km)
+    print(f"{len(coords)} route points (~{route_km:.0f} km), {n} stations, buffer {BUFFER_KM} km")
+
+    t = time.perf_counter()
+    for _ in range(REPEAT):
+        found = index.along_route(coords, BUFFER_KM)
+    grid_ms = (time.perf_counter() - t) / REPEAT * 1000
+    t = time.perf_counter()
+    expected = brute_force(index, coords)
+    brute_ms = (time.perf_counter() - t) * 1000
+    assert {s["id"] for s in found} == {int(index.ids[i]) for i in expected}
+    print(f"segment grid {grid_ms:>9.1f} ms  ({len(found)} stations)")
+    print(f"brute force  {brute_ms:>9.1f} ms  ({math.ceil(brute_ms / grid_ms)}x)")
+
+if __name__ == "__main__":
+    main()
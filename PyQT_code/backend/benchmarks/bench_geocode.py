@@ -0,0 +1,51 @@
+"""Autocomplete latency of the local geocoder.
+
+    python benchmarks/bench_geocode.py [places] [--extract places.csv]
+
+Indexes a synthetic national-scale place set (or a real extract) and times
+Geocoder.search for every prefix of a set of queries, as an autocomplete box
+would send them while typing, with the caller's position for ranking.
+"""
+import argparse
+import os
+import sys
+import time
+import numpy as np
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from services.geocoder import Geocoder
+
+SYLLABLES = ["ra", "ja", "na", "ga", "pur", "ka", "li", "sh", "an", "de", "hi", "ma", "ba", "ad", "ko", "ta", "vi", "ha"]
+KINDS = ["city", "town", "suburb", "village", "neighbourhood", "hamlet", "", "", ""]
+SUFFIXES = ["Nagar", "Road", "Market", "Chowk", "Colony", "Station", "Park", "Vihar", "Enclave", ""]
+QUERIES = ["rajana nagar", "kali", "shade market", "new", "hima", "b", "station road", "adko", "tavi park"]
+
+def synthetic_places(n, rng):
+    syllables = rng.integers(0, len(SYLLABLES), (max(n // 20, 100), 3))
+    words = ["".join(SYLLABLES[k] for k in row[:2 + i % 2]).capitalize() for i, row in enumerate(syllables)]
+    pick = lambda options: [options[k] for k in rng.integers(0, len(options), n)]
+    names = [f"{w} {s}".strip() for w, s in zip(pick(words), pick(SUFFIXES))]
+    return Geocoder(names, rng.uniform(8, 32, n), rng.uniform(68, 90, n), pick(KINDS), addresses=pick(words))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("places", nargs="?", type=int, default=500_000)
+    parser.add_argument("--extract", help="places file to index instead of synthetic data")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    t = time.perf_counter()
+    geocoder = Geocoder.load(args.extract) if args.extract else synthetic_places(args.places, rng)
+    print(f"indexed {len(geocoder)} places ({len(geocoder.tokens)} words) in {time.perf_counter() - t:.1f} s")
+
+    timings = []
+    for query in QUERIES:
+        for end in range(1, len(query) + 1):
+            started = time.perf_counter()
+            geocoder.search(query[:end], 28.61, 77.21, limit=5)
+            timings.append((time.perf_counter() - started) * 1000)
+    p50, p95, p99 = np.percentile(timings, [50, 95, 99])
+    print(f"{len(timings)} keystrokes: p50 {p50:.2f} ms  p95 {p95:.2f} ms  p99 {p99:.2f} ms  max {max(timings):.2f} ms")
+    print("top hits for 'kali':", [r["display_name"] for r in geocoder.search("kali", 28.61, 77.21, limit=3)])
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Route transport cost: JSON coordinate arrays vs encoded polylines.
+
+    python benchmarks/bench_polyline.py [points]
+
+Measures Python-side encode time and payload size (what goes through runJavaScript),
+and, when `node` is on PATH, the JS-side JSON.parse vs decodePolyline time using the
+decoder shipped in app/assets/map.html. Leaflet draw time is not covered here.
+"""
+import json
+import math
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from services import polyline
+
+MAP_HTML = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "app", "assets", "map.html")
+REPEAT = 20
+
+def synthetic_route(n):
+    # A wiggly ~1 m-spaced drive, like an OSRM overview=full geometry.
+    return [[77.0 + i * 1e-5, 28.5 + 2e-4 * math.sin(i / 50)] for i in range(n)]
+
+def timed(fn, *args):
+    t = time.perf_counter()
+    for _ in range(REPEAT):
+        out = fn(*args)
+    return out, (time.perf_counter() - t) / REPEAT * 1000
+
+def js_timings(json_text, encoded, precision):
+    with open(MAP_HTML, encoding="utf-8") as f:
+        html = f.read()
+    decoder = html[html.index("function decodePolyline"):html.index("window.mapApi = {")]
+    script = decoder + f"""
+const jsonText = {json.dumps(json_text)}, encoded = {json.dumps(encoded)};
+function bench(fn) {{ const t = performance.now(); for (let i = 0; i < {REPEAT}; i++) fn(); return (performance.now() - t) / {REPEAT}; }}
+console.log(JSON.stringify([bench(() => JSON.parse(jsonText).coordinates.map(c => [c[1], c[0]])),
+                            bench(() => decodePolyline(encoded, {precision}))]));
+"""
+    with tempfile.NamedTemporaryFile("w", suffix=".js", delete=False) as f:
+        f.write(script)
+    try:
+        out = subprocess.run(["node", f.name], capture_output=True, text=True, check=True).stdout
+    finally:
+        os.unlink(f.name)
+    return json.loads(out)
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    coords = synthetic_route(n)
+    geometry = {"type": "LineString", "coordinates": coords}
+    json_text, json_ms = timed(json.dumps, geometry)
+    print(f"{n} points")
+    print(f"json      {len(json_text) / 1024:>8.1f} KiB  encode {json_ms:>7.2f} ms")
+    for precision in (5, 6):
+        encoded, enc_ms = timed(polyline.encode, coords, precision)
+        _, dec_ms = timed(polyline.decode, encoded, precision)
+        line = f"polyline{precision} {len(encoded) / 1024:>8.1f} KiB  encode {enc_ms:>7.2f} ms  py-decode {dec_ms:>7.2f} ms"
+        if shutil.which("node"):
+            parse_ms, js_dec_ms = js_timings(json_text, encoded, precision)
+            line += f"  | js JSON.parse {parse_ms:>6.2f} ms vs decodePolyline {js_dec_ms:>6.2f} ms"
+        print(line)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Insert and range-query throughput of the RouteHistory table, bare SQLite vs the tuned storage layer.
+
+    python benchmarks/bench_storage.py [rows] [vehicles]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from sqlalchemy import MetaData, Table, Column, Integer, Float, DateTime, String, insert, select
+from database import create_storage_engine
+from models import RouteHistory, route_history_row
+
+SINGLE_COMMITS = 500
+BATCH_SIZE = 500
+QUERIES = 200
+
+def bare_table():
+    # The schema before indexing: primary key only.
+    return Table("routes", MetaData(), Column("id", Integer, primary_key=True, index=True),
+                 Column("lat", Float), Column("lng", Float), Column("battery", Integer),
+                 Column("timestamp", DateTime), Column("vehicle_id", String), Column("bucket", Integer))
+
+def make_rows(n, vehicles):
+    start = datetime(2025, 1, 1)
+    return [route_history_row(random.uniform(28.4, 28.8), random.uniform(77.0, 77.4), random.randint(0, 100),
+                              start + timedelta(seconds=i), f"car-{i % vehicles}") for i in range(n)]
+
+def bench(label, engine, table, rows, vehicles):
+    table.metadata.create_all(engine)
+    t = time.perf_counter()
+    for row in rows[:SINGLE_COMMITS]:
+        with engine.begin() as conn:
+            conn.execute(insert(table), row)
+    single = SINGLE_COMMITS / (time.perf_counter() - t)
+
+    t = time.perf_counter()
+    for i in range(SINGLE_COMMITS, len(rows), BATCH_SIZE):
+        with engine.begin() as conn:
+            conn.execute(insert(table), rows[i:i + BATCH_SIZE])
+    bulk = (len(rows) - SINGLE_COMMITS) / (time.perf_counter() - t)
+
+    start, span = rows[0]["timestamp"], timedelta(seconds=len(rows))
+    t = time.perf_counter()
+    with engine.connect() as conn:
+        for _ in range(QUERIES):
+            lo = start + span * random.random()
+            conn.execute(select(table).where(table.c.vehicle_id == f"car-{random.randrange(vehicles)}",
+                                             table.c.timestamp.between(lo, lo + timedelta(minutes=10)))).fetchall()
+    by_vehicle = QUERIES / (time.perf_counter() - t)
+
+    buckets = [r["bucket"] for r in random.sample(rows, QUERIES)]
+    t = time.perf_counter()
+    with engine.connect() as conn:
+        for bucket in buckets:
+            conn.execute(select(table).where(table.c.bucket == bucket,
+                                             table.c.timestamp.between(start, start + span / 2))).fetchall()
+    by_bucket = QUERIES / (time.perf_counter() - t)
+
+    print(f"{label:<8} single-commit {single:>9.0f} rows/s | bulk {bulk:>9.0f} rows/s | "
+          f"vehicle+time {by_vehicle:>8.0f} q/s | bucket+time {by_bucket:>8.0f} q/s")
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    vehicles = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    random.seed(0)
+    rows = make_rows(n, vehicles)
+    with tempfile.TemporaryDirectory() as tmp:
+        before = create_storage_engine(f"sqlite:///{os.path.join(tmp, 'before.db')}", pragmas=None)
+        after = create_storage_engine(f"sqlite:///{os.path.join(tmp, 'after.db')}")
+        bench("before", before, bare_table(), rows, vehicles)
+        bench("after", after, RouteHistory.__table__, rows, vehicles)
+        before.dispose(); after.dispose()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,267 @@
+"""Asynchronous fleet simulator and load generator for the backend.
+
+    python benchmarks/fleet_sim.py --spawn [--vehicles 50] [--duration 30] [--mode mix]
+    python benchmarks/fleet_sim.py --url http://127.0.0.1:8000 --routes drives.json --mode ws
+
+Each virtual vehicle drives a synthetic or recorded route through the energy model
+(services/energy_model.py), so position, speed and battery drain follow the same
+profile the map simulation uses, and reports at `--rate` Hz through:
+
+    update  POST /api/location/update, one fix per request
+    batch   POST /api/location/batch, `--batch-size` fixes per request
+    ws      WS /ws/telemetry, one frame per message
+    mix     vehicles split round-robin over the three
+
+Requests are paced on a fixed schedule and latency is measured from the scheduled
+send time, so a slow server shows up as latency instead of as a lower send rate.
+For `ws`, latency is the time to hand the frame to the socket; server error replies
+count as errors. `--spawn` starts the backend on a temporary SQLite database plus a
+local OpenChargeMap stub (benchmarks/ocm_stub.py) so no external API is called.
+
+`--routes` takes a JSON file holding a list of routes, each a [[lng, lat], ...] list
+or a GeoJSON LineString/Feature; a FeatureCollection works too.
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import numpy as np
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BACKEND_DIR)
+import httpx
+from services.energy_model import build_profile
+
+DELHI = (28.6139, 77.2090)
+
+
+class Stats:
+    """Per-endpoint latency samples and error counts."""
+
+    def __init__(self):
+        self.latency_ms, self.errors = {}, {}
+
+    def record(self, endpoint, started, ok, count=1):
+        elapsed = (time.perf_counter() - started) * 1000
+        self.latency_ms.setdefault(endpoint, []).extend([elapsed] * count)
+        if not ok:
+            self.errors[endpoint] = self.errors.get(endpoint, 0) + count
+
+    def error(self, endpoint, count=1):
+        self.errors[endpoint] = self.errors.get(endpoint, 0) + count
+
+    def report(self, duration_s):
+        print(f"{'endpoint':<24}{'fixes':>8}{'fix/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'errors':>9}")
+        for endpoint in sorted(set(self.latency_ms) | set(self.errors)):
+            samples = np.array(self.latency_ms.get(endpoint, [0.0]))
+            n = len(self.latency_ms.get(endpoint, []))
+            p50, p95, p99 = np.percentile(samples, [50, 95, 99])
+            errors = self.errors.get(endpoint, 0)
+            print(f"{endpoint:<24}{n:>8}{n / duration_s:>9.1f}{p50:>9.1f}{p95:>9.1f}{p99:>9.1f}"
+                  f"{errors / max(n, 1):>8.1%}")
+
+
+class Vehicle:
+    """A car following a route; its state at any time comes from the route's energy profile."""
+
+    def __init__(self, vehicle_id, coords, start_soc, time_scale):
+        self.vehicle_id, self.coords, self.time_scale = vehicle_id, coords, time_scale
+        self.profile = build_profile(coords)
+        self.soc = self.profile.soc(start_soc)
+        # Stagger the fleet so vehicles are not all at the start of their routes.
+        self.offset_s = random.uniform(0, self.profile.elapsed_s[-1])
+        self.started = time.time()
+
+    def fix(self):
+        total = max(self.profile.elapsed_s[-1], 1.0)
+        t = (self.offset_s + (time.time() - self.started) * self.time_scale) % total
+        i = max(self.profile.index_at(t), 0)
+        lng, lat = self.coords[i]
+        return {"lat": lat, "lng": lng, "batteryLevel": int(round(self.soc[i])), "vehicleId": self.vehicle_id,
+                "speed": round(float(self.profile.speed_kmh[i]), 1), "timestamp": int(time.time() * 1000)}
+
+
+def synthetic_route(rng, center=DELHI, km=None):
+    """A wandering drive with a point every ~20 m, starting near `center`."""
+    km = km or rng.uniform(3, 20)
+    n = int(km * 50)
+    heading = rng.uniform(0, 2 * math.pi) + np.cumsum(rng.normal(0, 0.05, n))
+    step_deg = 0.02 / 111.32
+    lat = center[0] + rng.uniform(-0.1, 0.1) + np.cumsum(np.cos(heading) * step_deg)
+    lng = center[1] + rng.uniform(-0.1, 0.1) + np.cumsum(np.sin(heading) * step_deg / math.cos(math.radians(center[0])))
+    return np.column_stack((lng, lat)).tolist()
+
+def load_routes(path):
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    items = data.get("features", [data]) if isinstance(data, dict) else data
+    routes = []
+    for item in items:
+        geometry = item.get("geometry", item) if isinstance(item, dict) else None
+        coords = geometry.get("coordinates") if geometry else item
+        if coords and len(coords) >= 2:
+            routes.append([[float(c[0]), float(c[1])] for c in coords])
+    return routes
+
+
+async def paced(rate_hz, until):
+    """Yields scheduled send times at `rate_hz` until the deadline."""
+    interval = 1.0 / rate_hz
+    scheduled = time.perf_counter() + random.uniform(0, interval)
+    while scheduled < until:
+        delay = scheduled - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        yield scheduled
+        scheduled += interval
+
+async def drive_update(client, vehicle, stats, rate_hz, until):
+    async for scheduled in paced(rate_hz, until):
+        try:
+            response = await client.post("/api/location/update", json=vehicle.fix())
+            stats.record("POST /location/update", scheduled, response.status_code == 200)
+        except httpx.HTTPError:
+            stats.record("POST /location/update", scheduled, False)
+
+async def drive_batch(client, vehicle, stats, rate_hz, until, batch_size):
+    fixes = []
+    async for scheduled in paced(rate_hz, until):
+        fixes.append(vehicle.fix())
+        if len(fixes) < batch_size:
+            continue
+        try:
+            response = await client.post("/api/location/batch", json={"vehicleId": vehicle.vehicle_id, "fixes": fixes})
+            stats.record("POST /location/batch", scheduled, response.status_code == 200, len(fixes))
+        except httpx.HTTPError:
+            stats.record("POST /location/batch", scheduled, False, len(fixes))
+        fixes = []
+
+async def drive_ws(ws_url, vehicle, stats, rate_hz, until):
+    import websockets
+    try:
+        async with websockets.connect(ws_url) as ws:
+            async def read_replies():
+                async for message in ws:
+                    if "error" in json.loads(message):
+                        stats.error("WS /ws/telemetry")
+            reader = asyncio.create_task(read_replies())
+            async for scheduled in paced(rate_hz, until):
+                await ws.send(json.dumps(vehicle.fix()))
+                stats.record("WS /ws/telemetry", scheduled, True)
+            reader.cancel()
+    except (OSError, websockets.WebSocketException):
+        stats.error("WS /ws/telemetry")
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+async def start_stub(port, stations, latency_ms):
+    import uvicorn
+    from ocm_stub import make_app, synthetic_pois
+    server = uvicorn.Server(uvicorn.Config(make_app(synthetic_pois(stations), latency_ms), host="127.0.0.1",
+                                           port=port, log_level="warning"))
+    task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.05)
+    return server, task
+
+def spawn_backend(port, stub_port, workdir):
+    env = dict(os.environ,
+               DATABASE_URL=f"sqlite:///{os.path.join(workdir, 'loadtest.db')}",
+               OCM_API_URL=f"http://127.0.0.1:{stub_port}/v3/poi/",
+               CHARGER_DUMP_PATH=os.path.join(workdir, "no-dump.json"),
+               ROUTE_CACHE_PATH="")
+    subprocess.run([sys.executable, "init_db.py"], cwd=BACKEND_DIR, env=env, check=True, capture_output=True)
+    return subprocess.Popen([sys.executable, "-m", "uvicorn", "app:app", "--host", "127.0.0.1", "--port", str(port),
+                             "--log-level", "warning"], cwd=BACKEND_DIR, env=env)
+
+async def wait_ready(client, timeout_s=30):
+    deadline = time.perf_counter() + timeout_s
+    while time.perf_counter() < deadline:
+        try:
+            if (await client.get("/api/location/buffer")).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError("Backend did not become ready")
+
+
+async def run(args):
+    rng = np.random.default_rng(args.seed)
+    random.seed(args.seed)
+    routes = load_routes(args.routes) if args.routes else [synthetic_route(rng) for _ in range(min(args.vehicles, 200))]
+    vehicles = [Vehicle(f"sim-{i}", routes[i % len(routes)], rng.uniform(10, 90), args.time_scale)
+                for i in range(args.vehicles)]
+
+    stub = backend = None
+    url = args.url
+    workdir = tempfile.mkdtemp(prefix="fleet-sim-")
+    if args.spawn:
+        stub_port, port = free_port(), free_port()
+        stub = await start_stub(stub_port, args.stations, args.stub_latency_ms)
+        backend = spawn_backend(port, stub_port, workdir)
+        url = f"http://127.0.0.1:{port}"
+    ws_url = url.replace("http", "ws", 1) + "/ws/telemetry"
+
+    stats = Stats()
+    limits = httpx.Limits(max_connections=args.vehicles, max_keepalive_connections=args.vehicles)
+    try:
+        async with httpx.AsyncClient(base_url=url, limits=limits, timeout=30) as client:
+            await wait_ready(client)
+            modes = ["update", "batch", "ws"] if args.mode == "mix" else [args.mode]
+            print(f"{args.vehicles} vehicles at {args.rate} Hz for {args.duration:.0f} s against {url} ({args.mode})")
+            until = time.perf_counter() + args.duration
+            tasks = []
+            for i, vehicle in enumerate(vehicles):
+                mode = modes[i % len(modes)]
+                if mode == "update":
+                    tasks.append(drive_update(client, vehicle, stats, args.rate, until))
+                elif mode == "batch":
+                    tasks.append(drive_batch(client, vehicle, stats, args.rate, until, args.batch_size))
+                else:
+                    tasks.append(drive_ws(ws_url, vehicle, stats, args.rate, until))
+            started = time.perf_counter()
+            await asyncio.gather(*tasks)
+            stats.report(time.perf_counter() - started)
+            buffer = (await client.get("/api/location/buffer")).json()
+            print(f"write-behind buffer: {json.dumps(buffer)}")
+        if stub:
+            print(f"OCM stub requests: {stub[0].config.app.state.requests}")
+    finally:
+        if backend:
+            backend.terminate()
+            backend.wait()
+        if stub:
+            stub[0].should_exit = True
+            await stub[1]
+        shutil.rmtree(workdir, ignore_errors=True)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="http://127.0.0.1:8000", help="backend under test (ignored with --spawn)")
+    parser.add_argument("--spawn", action="store_true", help="start the backend and an OCM stub locally")
+    parser.add_argument("--vehicles", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=30, help="seconds")
+    parser.add_argument("--rate", type=float, default=1.0, help="fixes per second per vehicle")
+    parser.add_argument("--mode", choices=["update", "batch", "ws", "mix"], default="mix")
+    parser.add_argument("--batch-size", type=int, default=10)
+    parser.add_argument("--routes", help="JSON file of recorded routes")
+    parser.add_argument("--time-scale", type=float, default=10, help="simulated seconds per wall-clock second")
+    parser.add_argument("--stations", type=int, default=5000, help="stub station count")
+    parser.add_argument("--stub-latency-ms", type=float, default=50)
+    parser.add_argument("--seed", type=int, default=0)
+    asyncio.run(run(parser.parse_args()))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Import-time budget for backend cold start.
+
+    python benchmarks/import_budget.py [--budget-ms 1200] [--runs 5] [--top 12]
+
+Imports `app` in fresh interpreters under `python -X importtime`, reports the
+median total and the slowest top-level dependencies, and exits non-zero when the
+median exceeds the budget (IMPORT_BUDGET_MS) or when a module that is meant to
+load lazily shows up at import time. Suitable as a CI gate.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Loaded on first use or by the startup warmup, never while importing the app.
+LAZY_MODULES = ("bs4",)
+
+def import_profile():
+    """{module: (self_us, cumulative_us)} for one cold `import app`."""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import app"], cwd=BACKEND_DIR,
+                            capture_output=True, text=True, check=True)
+    modules = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        fields = line[len("import time:"):].split("|")
+        if not fields[0].strip().isdigit():
+            continue  # header row
+        modules[fields[2].strip()] = (int(fields[0]), int(fields[1]))
+    return modules
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--budget-ms", type=float, default=float(os.getenv("IMPORT_BUDGET_MS", "1200")))
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=12)
+    args = parser.parse_args()
+
+    profiles = [import_profile() for _ in range(args.runs)]
+    totals = [p["app"][1] / 1000 for p in profiles]
+    total_ms = statistics.median(totals)
+    # Self time summed per top-level package (this repo's own modules are grouped as well).
+    per_package = {}
+    for profile in profiles:
+        sums = {}
+        for name, (self_us, _) in profile.items():
+            root = name.split(".")[0]
+            sums[root] = sums.get(root, 0) + self_us
+        for root, us in sums.items():
+            per_package.setdefault(root, []).append(us / 1000)
+    print(f"import app: median {total_ms:.0f} ms over {args.runs} runs (min {min(totals):.0f}, max {max(totals):.0f}), "
+          f"budget {args.budget_ms:.0f} ms")
+    for root, samples in sorted(per_package.items(), key=lambda item: -statistics.median(item[1]))[:args.top]:
+        print(f"  {statistics.median(samples):>8.1f} ms  {root}")
+
+    failed = False
+    eager = [m for m in LAZY_MODULES if any(m in p for p in profiles)]
+    if eager:
+        print(f"FAIL: imported at startup but expected to load lazily: {', '.join(eager)}")
+        failed = True
+    if total_ms > args.budget_ms:
+        print(f"FAIL: import time {total_ms:.0f} ms exceeds the {args.budget_ms:.0f} ms budget")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
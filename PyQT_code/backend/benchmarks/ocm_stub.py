@@ -0,0 +1,74 @@
+"""Local stand-in for the OpenChargeMap POI API, for load tests.
+
+    python benchmarks/ocm_stub.py [--port 8765] [--stations 5000] [--latency-ms 50] [--dump chargers.json]
+
+Answers GET /v3/poi/ with OCM-shaped POIs from a synthetic station set (or an OCM
+JSON dump), honouring latitude/longitude/distance/maxresults and the polyline
+corridor filter. `--latency-ms` adds a fixed delay to mimic the real round trip.
+Point the backend at it with OCM_API_URL=http://127.0.0.1:<port>/v3/poi/ and a
+CHARGER_DUMP_PATH that does not exist, so the live path is exercised.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import numpy as np
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from fastapi import FastAPI, Query
+from services import polyline
+from services.charger_index import ChargerIndex
+
+DELHI = (28.6139, 77.2090)
+
+def synthetic_pois(n, center=DELHI, spread_deg=0.5, seed=0):
+    rng = np.random.default_rng(seed)
+    lats = center[0] + rng.uniform(-spread_deg, spread_deg, n)
+    lngs = center[1] + rng.uniform(-spread_deg, spread_deg, n)
+    return [{"ID": i + 1, "AddressInfo": {"ID": i + 1, "Title": f"Stub Station {i + 1}",
+                                          "Latitude": float(lat), "Longitude": float(lng)}}
+            for i, (lat, lng) in enumerate(zip(lats, lngs))]
+
+def make_app(pois, latency_ms=0.0):
+    index = ChargerIndex.from_ocm(pois)
+    by_id = {poi["ID"]: poi for poi in pois}
+    app = FastAPI()
+    app.state.requests = 0
+
+    @app.get("/v3/poi/")
+    async def poi(latitude: float = Query(None), longitude: float = Query(None), distance: float = Query(10),
+                  maxresults: int = Query(100), polyline_: str = Query(None, alias="polyline")):
+        app.state.requests += 1
+        if latency_ms:
+            await asyncio.sleep(latency_ms / 1000)
+        if polyline_:
+            found = index.along_route(polyline.decode(polyline_, 5), distance, maxresults)
+        elif latitude is not None and longitude is not None:
+            found = index.within_radius(latitude, longitude, distance, maxresults)
+        else:
+            found = []
+        return [by_id[s["id"]] for s in found]
+
+    @app.get("/stats")
+    async def stats():
+        return {"requests": app.state.requests, "stations": len(index)}
+
+    return app
+
+def main():
+    import uvicorn
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--stations", type=int, default=5000)
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--dump", help="OCM JSON dump to serve instead of synthetic stations")
+    args = parser.parse_args()
+    if args.dump:
+        with open(args.dump, "r", encoding="utf-8") as f:
+            pois = json.load(f)
+    else:
+        pois = synthetic_pois(args.stations)
+    uvicorn.run(make_app(pois, args.latency_ms), host="127.0.0.1", port=args.port, log_level="warning")
+
+if __name__ == "__main__":
+    main()
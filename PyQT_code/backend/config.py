@@ -0,0 +1,156 @@
+import os
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.join(BASE_DIR, 'data')
+
+def get_data_path(filename):
+    return os.path.join(DATA_DIR, filename)
+
+# Served at /static; defaults to the PyQt app's assets next to this backend.
+FRONTEND_DIR = os.getenv("FRONTEND_DIR", os.path.join(os.path.dirname(BASE_DIR), "app", "assets"))
+
+# --- Startup ---
+# Load the charger index, database engine and parsers in the background right after startup
+# instead of on the first request that needs them.
+STARTUP_WARMUP = os.getenv("STARTUP_WARMUP", "1") == "1"
+
+# --- Charging stations ---
+# OpenChargeMap-format JSON dump (list of POIs) loaded into the in-process index.
+CHARGER_DUMP_PATH = os.getenv("CHARGER_DUMP_PATH", get_data_path("chargers.json"))
+CHARGER_GRID_DEG = float(os.getenv("CHARGER_GRID_DEG", "0.05"))  # ~5.5 km cells
+CHARGER_SEARCH_RADIUS_KM = float(os.getenv("CHARGER_SEARCH_RADIUS_KM", "5"))
+CHARGER_CORRIDOR_KM = float(os.getenv("CHARGER_CORRIDOR_KM", "2"))  # default buffer either side of a route
+# Concurrent live nearest-station lookups within the same cell share one OpenChargeMap request.
+CHARGER_COALESCE_GRID_M = float(os.getenv("CHARGER_COALESCE_GRID_M", "100"))
+OCM_API_URL = os.getenv("OCM_API_URL", "https://api.openchargemap.io/v3/poi/")
+OCM_API_KEY = os.getenv("OCM_API_KEY", "DEMO")
+
+# --- Map tiles ---
+# One MBTiles-style SQLite file per style in TILE_CACHE_DIR, served at /tiles/{style}/{z}/{x}/{y}.
+TILE_CACHE_DIR = os.getenv("TILE_CACHE_DIR", get_data_path("tiles"))
+TILE_CACHE_MAX_BYTES = int(os.getenv("TILE_CACHE_MAX_MB", "512")) * 1024 * 1024  # per style; prefetched tiles are kept
+TILE_REFRESH_S = float(os.getenv("TILE_REFRESH_S", str(7 * 24 * 3600)))  # older tiles are refetched in the background
+TILE_BROWSER_MAX_AGE_S = int(os.getenv("TILE_BROWSER_MAX_AGE_S", "86400"))
+TILE_MAX_ZOOM = int(os.getenv("TILE_MAX_ZOOM", "19"))
+# {s} rotates over TILE_SUBDOMAINS.
+TILE_STYLES = {
+    "light": os.getenv("TILE_URL_LIGHT", "https://tile.openstreetmap.org/{z}/{x}/{y}.png"),
+    "dark": os.getenv("TILE_URL_DARK", "https://{s}.basemaps.cartocdn.com/dark_all/{z}/{x}/{y}.png"),
+    "street": os.getenv("TILE_URL_STREET", "https://{s}.tile.openstreetmap.fr/hot/{z}/{x}/{y}.png"),
+}
+TILE_SUBDOMAINS = os.getenv("TILE_SUBDOMAINS", "abc")
+
+# --- Geocoding ---
+# Places extract for /api/geocode: CSV (name,lat,lon[,type,importance,address]), GeoJSON points or OSM XML.
+GEOCODER_PLACES_PATH = os.getenv("GEOCODER_PLACES_PATH", get_data_path("places.csv"))
+GEOCODER_DISTANCE_WEIGHT = float(os.getenv("GEOCODER_DISTANCE_WEIGHT", "0.15"))  # score lost per log(1 + km)
+# Used only without a local extract.
+NOMINATIM_URL = os.getenv("NOMINATIM_URL", "https://nominatim.openstreetmap.org/search")
+GEOCODER_COUNTRY_CODES = os.getenv("GEOCODER_COUNTRY_CODES", "in")
+
+# --- Upstream HTTP client ---
+HTTP_TIMEOUT_S = float(os.getenv("HTTP_TIMEOUT_S", "10"))
+HTTP_CONNECT_TIMEOUT_S = float(os.getenv("HTTP_CONNECT_TIMEOUT_S", "5"))
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "500"))
+HTTP_MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", "100"))
+HTTP_KEEPALIVE_EXPIRY_S = float(os.getenv("HTTP_KEEPALIVE_EXPIRY_S", "30"))
+HTTP_MAX_PER_HOST = int(os.getenv("HTTP_MAX_PER_HOST", "100"))
+HTTP_USER_AGENT = "TataEVApp/1.0"
+# Hedged requests: a second attempt once the first is slower than the upstream's recent p95.
+HTTP_HEDGE = os.getenv("HTTP_HEDGE", "1") == "1"
+HTTP_HEDGE_MIN_SAMPLES = int(os.getenv("HTTP_HEDGE_MIN_SAMPLES", "20"))
+HTTP_HEDGE_MIN_DELAY_S = float(os.getenv("HTTP_HEDGE_MIN_DELAY_S", "0.05"))
+# Circuit breaker per upstream.
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5"))
+CIRCUIT_RESET_S = float(os.getenv("CIRCUIT_RESET_S", "30"))
+
+# --- Request deadlines ---
+# Latency budget per API request; upstream calls only get what is left of it.
+REQUEST_BUDGET_S = float(os.getenv("REQUEST_BUDGET_S", "5"))
+# Location updates and telemetry frames sit on the vehicles' hot path.
+LOCATION_BUDGET_S = float(os.getenv("LOCATION_BUDGET_S", "1"))
+
+# --- Location ingestion ---
+LOW_BATTERY_THRESHOLD = int(os.getenv("LOW_BATTERY_THRESHOLD", "25"))
+# Further bands below the threshold; crossing one refreshes the charger recommendation.
+LOW_BATTERY_BANDS = tuple(int(b) for b in os.getenv("LOW_BATTERY_BANDS", "15,5").split(",") if b.strip())
+LOW_BATTERY_HYSTERESIS = float(os.getenv("LOW_BATTERY_HYSTERESIS", "5"))  # points above a band to leave it
+LOW_BATTERY_RECOMPUTE_M = float(os.getenv("LOW_BATTERY_RECOMPUTE_M", "1000"))
+LOW_BATTERY_RETRY_S = float(os.getenv("LOW_BATTERY_RETRY_S", "30"))  # wait before retrying a failed charger lookup
+LOW_BATTERY_RULES_MAX_VEHICLES = int(os.getenv("LOW_BATTERY_RULES_MAX_VEHICLES", "100000"))
+LOCATION_BATCH_MAX = int(os.getenv("LOCATION_BATCH_MAX", "1000"))
+
+# --- RouteHistory write-behind buffer ---
+HISTORY_BUFFER_CAPACITY = int(os.getenv("HISTORY_BUFFER_CAPACITY", "10000"))
+HISTORY_FLUSH_ROWS = int(os.getenv("HISTORY_FLUSH_ROWS", "500"))
+HISTORY_FLUSH_INTERVAL_S = float(os.getenv("HISTORY_FLUSH_INTERVAL_S", "1.0"))
+HISTORY_RETRY_MAX_S = float(os.getenv("HISTORY_RETRY_MAX_S", "30"))  # longest wait between retries on a locked database
+HISTORY_STOP_TIMEOUT_S = float(os.getenv("HISTORY_STOP_TIMEOUT_S", "10"))  # shutdown keeps retrying queued rows this long
+HISTORY_DEAD_LETTER_MAX = int(os.getenv("HISTORY_DEAD_LETTER_MAX", "1000"))  # dropped rows kept for inspection
+
+# --- Storage ---
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./mapapp.db")
+# Applied to every new SQLite connection.
+SQLITE_PRAGMAS = {
+    "journal_mode": os.getenv("SQLITE_JOURNAL_MODE", "WAL"),
+    "synchronous": os.getenv("SQLITE_SYNCHRONOUS", "NORMAL"),
+    "mmap_size": int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024))),
+    "cache_size": int(os.getenv("SQLITE_CACHE_SIZE_KB", "65536")) * -1,  # negative = KiB
+    "temp_store": "MEMORY",
+    "busy_timeout": int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000")),
+}
+HISTORY_BUCKET_DEG = float(os.getenv("HISTORY_BUCKET_DEG", "0.01"))  # ~1.1 km spatial buckets
+
+# --- Route cache ---
+ROUTE_CACHE_GRID_M = float(os.getenv("ROUTE_CACHE_GRID_M", "10"))
+ROUTE_CACHE_MAX_BYTES = int(os.getenv("ROUTE_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+ROUTE_CACHE_TTL_S = float(os.getenv("ROUTE_CACHE_TTL_S", "3600"))
+ROUTE_CACHE_PATH = os.getenv("ROUTE_CACHE_PATH", "")  # empty = in-memory only
+
+# --- Weather ---
+WEATHER_URL = "https://www.timeanddate.com/weather/{country}/{city}"
+WEATHER_TTL_S = float(os.getenv("WEATHER_TTL_S", "600"))
+WEATHER_MAX_STALE_S = float(os.getenv("WEATHER_MAX_STALE_S", "86400"))  # older entries are refetched inline
+
+# --- Fleet state ---
+FLEET_INITIAL_CAPACITY = int(os.getenv("FLEET_INITIAL_CAPACITY", "1024"))
+FLEET_QUERY_LIMIT = int(os.getenv("FLEET_QUERY_LIMIT", "1000"))
+
+# --- Trajectory simplification ---
+ROUTE_SIMPLIFY_TOLERANCE_M = float(os.getenv("ROUTE_SIMPLIFY_TOLERANCE_M", "5"))
+HISTORY_SIMPLIFY_TOLERANCE_M = float(os.getenv("HISTORY_SIMPLIFY_TOLERANCE_M", "5"))
+HISTORY_ROLLUP_AFTER_S = float(os.getenv("HISTORY_ROLLUP_AFTER_S", str(24 * 3600)))
+HISTORY_TRIP_GAP_S = float(os.getenv("HISTORY_TRIP_GAP_S", "300"))  # a longer silence starts a new trip
+# Rollup also keeps a fix whenever the battery has moved this many points since the last kept one.
+HISTORY_BATTERY_DELTA = float(os.getenv("HISTORY_BATTERY_DELTA", "1"))
+ROUTE_POLYLINE_PRECISION = int(os.getenv("ROUTE_POLYLINE_PRECISION", "5"))
+
+# --- History queries ---
+HISTORY_PAGE_SIZE = int(os.getenv("HISTORY_PAGE_SIZE", "500"))
+HISTORY_PAGE_MAX = int(os.getenv("HISTORY_PAGE_MAX", "5000"))
+HISTORY_MAX_POINTS_LIMIT = int(os.getenv("HISTORY_MAX_POINTS_LIMIT", "10000"))
+HISTORY_EXPORT_CHUNK_ROWS = int(os.getenv("HISTORY_EXPORT_CHUNK_ROWS", "5000"))  # rows fetched and encoded per step
+HISTORY_EXPORT_GZIP_LEVEL = int(os.getenv("HISTORY_EXPORT_GZIP_LEVEL", "6"))
+
+# --- Offline routing ---
+ROUTING_ENGINE = os.getenv("ROUTING_ENGINE", "ors")  # "ors" or "local"
+# OSM extract (.osm/.pbf) or CSV edge list; preprocessing is cached next to it as <path>.alt.npz.
+ROAD_GRAPH_PATH = os.getenv("ROAD_GRAPH_PATH", get_data_path("roads.osm"))
+ROUTING_LANDMARKS = int(os.getenv("ROUTING_LANDMARKS", "8"))
+ROUTING_SNAP_MAX_KM = float(os.getenv("ROUTING_SNAP_MAX_KM", "2"))
+
+# --- Energy model ---
+# Defaults approximate a compact EV (Nexon EV class); override per vehicle through the environment.
+VEHICLE_MASS_KG = float(os.getenv("VEHICLE_MASS_KG", "1480"))  # kerb weight + driver
+VEHICLE_CDA_M2 = float(os.getenv("VEHICLE_CDA_M2", "0.75"))  # drag coefficient x frontal area
+VEHICLE_CRR = float(os.getenv("VEHICLE_CRR", "0.011"))  # rolling resistance
+VEHICLE_DRIVETRAIN_EFF = float(os.getenv("VEHICLE_DRIVETRAIN_EFF", "0.88"))  # battery -> wheel
+VEHICLE_REGEN_EFF = float(os.getenv("VEHICLE_REGEN_EFF", "0.6"))  # wheel -> battery when braking
+VEHICLE_AUX_POWER_W = float(os.getenv("VEHICLE_AUX_POWER_W", "600"))  # HVAC, electronics
+VEHICLE_BATTERY_KWH = float(os.getenv("VEHICLE_BATTERY_KWH", "30.2"))  # usable capacity
+VEHICLE_CRUISE_KMH = float(os.getenv("VEHICLE_CRUISE_KMH", "45"))
+VEHICLE_ACCEL_MS2 = float(os.getenv("VEHICLE_ACCEL_MS2", "1.5"))
+VEHICLE_DECEL_MS2 = float(os.getenv("VEHICLE_DECEL_MS2", "2.0"))
+VEHICLE_LATERAL_ACCEL_MS2 = float(os.getenv("VEHICLE_LATERAL_ACCEL_MS2", "2.5"))  # caps cornering speed
+# Optional ESRI ASCII grid (.asc) of elevations in metres, WGS84 degrees; flat terrain without it.
+ELEVATION_DEM_PATH = os.getenv("ELEVATION_DEM_PATH", get_data_path("dem.asc"))
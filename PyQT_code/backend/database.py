@@ -1,8 +1,59 @@
-from sqlalchemy import create_engine
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+import threading
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import declarative_base, sessionmaker
 
-SQLALCHEMY_DATABASE_URL = "sqlite:///./mapapp.db"
-engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Handle both relative and absolute imports
+try:
+    from .config import DATABASE_URL, SQLITE_PRAGMAS
+except ImportError:
+    from config import DATABASE_URL, SQLITE_PRAGMAS
+
+def create_storage_engine(url, pragmas=SQLITE_PRAGMAS):
+    """Creates an engine; for SQLite every new connection gets `pragmas` applied."""
+    if not url.startswith("sqlite"):
+        return create_engine(url)
+    engine = create_engine(url, connect_args={"check_same_thread": False})
+
+    @event.listens_for(engine, "connect")
+    def _apply_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in (pragmas or {}).items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+    return engine
+
+SQLALCHEMY_DATABASE_URL = DATABASE_URL
 Base = declarative_base()
+
+# The engine and session factory are created on first use, not at import.
+_engine = None
+_session_factory = None
+_engine_lock = threading.Lock()
+
+def get_engine():
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = create_storage_engine(SQLALCHEMY_DATABASE_URL)
+    return _engine
+
+def SessionLocal():
+    global _session_factory
+    if _session_factory is None:
+        _session_factory = sessionmaker(autocommit=False, autoflush=False, bind=get_engine())
+    return _session_factory()
+
+def __getattr__(name):
+    # `from database import engine` keeps working for scripts.
+    if name == "engine":
+        return get_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def get_db():
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
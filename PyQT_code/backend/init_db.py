@@ -1,9 +1,36 @@
 import os
 import sys
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from sqlalchemy import inspect, text
+from config import HISTORY_BUCKET_DEG
 from database import Base, engine
 from models import RouteHistory  # Import your SQLAlchemy models here
+from services.geo import grid_cols
 
-# Create all tables
+def migrate_route_history():
+    """Brings a pre-existing `routes` table up to the current schema in place."""
+    inspector = inspect(engine)
+    if not inspector.has_table(RouteHistory.__tablename__):
+        return
+    columns = {c["name"] for c in inspector.get_columns(RouteHistory.__tablename__)}
+    with engine.begin() as conn:
+        if "vehicle_id" not in columns:
+            conn.execute(text("ALTER TABLE routes ADD COLUMN vehicle_id VARCHAR"))
+            print("➕ Added routes.vehicle_id")
+        if "bucket" not in columns:
+            conn.execute(text("ALTER TABLE routes ADD COLUMN bucket INTEGER"))
+            print("➕ Added routes.bucket")
+        # Same cell numbering as services.geo.grid_cell; lat+90 and lng+180 are never negative.
+        filled = conn.execute(text(
+            "UPDATE routes SET bucket = CAST((lat + 90.0) / :cell AS INTEGER) * :n_cols"
+            " + CAST((lng + 180.0) / :cell AS INTEGER) WHERE bucket IS NULL AND lat IS NOT NULL AND lng IS NOT NULL"
+        ), {"cell": HISTORY_BUCKET_DEG, "n_cols": grid_cols(HISTORY_BUCKET_DEG)}).rowcount
+        if filled:
+            print(f"🗺️  Backfilled spatial bucket for {filled} rows")
+    for index in RouteHistory.__table__.indexes:
+        index.create(bind=engine, checkfirst=True)
+
+# Migrate existing tables, then create anything that is still missing
+migrate_route_history()
 Base.metadata.create_all(bind=engine)
 print("✅ Database tables created successfully.")
@@ -1,22 +1,46 @@
-from pydantic import BaseModel
-from sqlalchemy import Column, Integer, Float, DateTime
-from datetime import datetime
+from pydantic import BaseModel, Field
+from sqlalchemy import Column, Integer, Float, DateTime, String, Index
+from datetime import datetime, timezone
+from typing import Literal, Optional, Union
 
 # For relative imports when running as module
 try:
     from .database import Base
+    from .config import LOCATION_BATCH_MAX, HISTORY_BUCKET_DEG, CHARGER_CORRIDOR_KM, ROUTE_POLYLINE_PRECISION
+    from .services.geo import grid_cell
 except ImportError:
     # For direct execution
     from database import Base
+    from config import LOCATION_BATCH_MAX, HISTORY_BUCKET_DEG, CHARGER_CORRIDOR_KM, ROUTE_POLYLINE_PRECISION
+    from services.geo import grid_cell
 
 class LocationIn(BaseModel):
     lat: float
     lng: float
     batteryLevel: int
+    vehicleId: Optional[str] = None
+    speed: Optional[float] = None  # km/h
+
+class LocationFix(LocationIn):
+    timestamp: int  # milliseconds since epoch
+
+class TelemetryFrame(LocationIn):
+    timestamp: Optional[int] = None  # milliseconds since epoch
+
+class LocationBatch(BaseModel):
+    vehicleId: Optional[str] = None  # applies to fixes that do not name a vehicle
+    fixes: list[LocationFix] = Field(..., min_length=1, max_length=LOCATION_BATCH_MAX)
 
 class RouteRequest(BaseModel):
     start: list[float]
     end: list[float]
+    geometryFormat: Literal["polyline", "geojson"] = "polyline"
+
+class CorridorRequest(BaseModel):
+    geometry: Union[str, list[list[float]]]  # encoded polyline or GeoJSON [[lng, lat], ...]
+    precision: int = ROUTE_POLYLINE_PRECISION  # of an encoded geometry
+    bufferKm: float = Field(CHARGER_CORRIDOR_KM, gt=0, le=50)
+    limit: Optional[int] = Field(None, ge=1)
 
 class RouteHistory(Base):
     __tablename__ = "routes"
@@ -25,3 +49,19 @@ class RouteHistory(Base):
     lng = Column(Float)
     battery = Column(Integer)
     timestamp = Column(DateTime, default=datetime.utcnow)
+    vehicle_id = Column(String, nullable=True)
+    bucket = Column(Integer, nullable=True)  # grid_cell(lat, lng, HISTORY_BUCKET_DEG)
+
+    __table_args__ = (
+        Index("ix_routes_vehicle_ts", "vehicle_id", "timestamp"),
+        Index("ix_routes_bucket_ts", "bucket", "timestamp"),
+        Index("ix_routes_timestamp", "timestamp"),
+    )
+
+def from_epoch_ms(ms):
+    return datetime.fromtimestamp(ms / 1000, tz=timezone.utc).replace(tzinfo=None)
+
+def route_history_row(lat, lng, battery, timestamp=None, vehicle_id=None):
+    """Column dict for a bulk RouteHistory insert, with the spatial bucket filled in."""
+    return {"lat": lat, "lng": lng, "battery": battery, "timestamp": timestamp or datetime.utcnow(),
+            "vehicle_id": vehicle_id, "bucket": grid_cell(lat, lng, HISTORY_BUCKET_DEG)}
@@ -0,0 +1,121 @@
+"""Seeds the map tile cache so the head unit can render the map without a network.
+
+    python prefetch_tiles.py --bbox 28.40,76.80,28.90,77.40 --zoom 10-15
+    python prefetch_tiles.py --route drive.geojson --buffer-km 1 --zoom 12-17 --style light dark
+    python prefetch_tiles.py --start 28.61,77.21 --end 28.98,77.70 --zoom 12-16
+
+`--route` takes a GeoJSON LineString/Feature or a [[lng, lat], ...] list; `--start`/`--end`
+plan the route with the backend's routing service first. Prefetched tiles are pinned, so
+the cache's size limit never evicts them, and tiles that are already fresh are not
+downloaded again. Mind the tile servers' usage policies (tile.openstreetmap.org forbids
+bulk downloading): keep `--concurrency` low or point TILE_URL_* at your own tile server.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from config import TILE_STYLES, TILE_MAX_ZOOM, TILE_REFRESH_S
+from services import http_client
+from services.tile_cache import (get_tile_store, fetch_and_store, tiles_in_bbox, tiles_along_route,
+                                 TileUnavailable)
+
+def parse_point(text):
+    lat, lng = (float(v) for v in text.split(","))
+    return [lat, lng]
+
+def parse_zoom(text):
+    low, _, high = text.partition("-")
+    return range(int(low), int(high or low) + 1)
+
+def load_route(path):
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if isinstance(data, dict):
+        data = data.get("features", [data])[0] if data.get("type") == "FeatureCollection" else data
+        data = (data.get("geometry") or data).get("coordinates")
+    return data
+
+async def plan_route(start, end):
+    from services.routing_service import get_route
+    route = await get_route(start, end, geometry_format="geojson")
+    if not route.get("routes"):
+        raise SystemExit(f"Could not plan a route: {route.get('message') or route.get('code')}")
+    return route["routes"][0]["geometry"]["coordinates"]
+
+async def prefetch(style, tiles, concurrency):
+    store = get_tile_store(style)
+    slots = asyncio.Semaphore(concurrency)
+    counts = {"downloaded": 0, "fresh": 0, "missing": 0, "failed": 0}
+
+    async def one(z, x, y):
+        async with slots:
+            fetched_at = await asyncio.to_thread(store.fetched_at, z, x, y)
+            if fetched_at is not None and time.time() - fetched_at < TILE_REFRESH_S:
+                await asyncio.to_thread(store.pin, z, x, y)
+                counts["fresh"] += 1
+                return
+            try:
+                found = await fetch_and_store(style, z, x, y, pinned=True)
+                counts["downloaded" if found else "missing"] += 1
+            except http_client.UPSTREAM_ERRORS + (TileUnavailable,) as e:
+                counts["failed"] += 1
+                print(f"WARNING: {style} {z}/{x}/{y} failed: {e}")
+
+    done = 0
+    for batch_start in range(0, len(tiles), 500):
+        batch = tiles[batch_start:batch_start + 500]
+        await asyncio.gather(*(one(*tile) for tile in batch))
+        done += len(batch)
+        print(f"{style}: {done}/{len(tiles)} tiles ({', '.join(f'{k} {v}' for k, v in counts.items())})")
+    return counts
+
+async def run(args):
+    coordinates = None
+    if args.route:
+        coordinates = load_route(args.route)
+    elif args.start and args.end:
+        coordinates = await plan_route(parse_point(args.start), parse_point(args.end))
+
+    tiles = []
+    for z in parse_zoom(args.zoom):
+        if coordinates is not None:
+            xs, ys = tiles_along_route(coordinates, args.buffer_km, z)
+        else:
+            xs, ys = tiles_in_bbox(*(float(v) for v in args.bbox.split(",")), z)
+        tiles.extend((z, int(x), int(y)) for x, y in zip(xs, ys))
+    print(f"{len(tiles)} tiles per style over zoom {args.zoom}")
+    if len(tiles) > args.max_tiles:
+        raise SystemExit(f"Refusing to fetch more than {args.max_tiles} tiles; narrow the area or raise --max-tiles")
+
+    try:
+        for style in args.style:
+            store = get_tile_store(style)
+            await prefetch(style, tiles, args.concurrency)
+            print(f"{style}: {store.size_bytes / 1e6:.1f} MB in {store.path}")
+    finally:
+        await http_client.close_client()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    area = parser.add_mutually_exclusive_group(required=True)
+    area.add_argument("--bbox", help="min_lat,min_lng,max_lat,max_lng")
+    area.add_argument("--route", help="GeoJSON or [[lng, lat], ...] route file")
+    area.add_argument("--start", help="lat,lng; plan a route to --end and prefetch along it")
+    parser.add_argument("--end", help="lat,lng")
+    parser.add_argument("--buffer-km", type=float, default=1.0, help="corridor half-width for routes")
+    parser.add_argument("--zoom", default="10-16", help="zoom level or range, e.g. 12-17")
+    parser.add_argument("--style", nargs="+", choices=sorted(TILE_STYLES), default=["light"])
+    parser.add_argument("--concurrency", type=int, default=2)
+    parser.add_argument("--max-tiles", type=int, default=50_000)
+    args = parser.parse_args()
+    if args.start and not args.end:
+        parser.error("--start needs --end")
+    if max(parse_zoom(args.zoom)) > TILE_MAX_ZOOM:
+        parser.error(f"zoom above TILE_MAX_ZOOM ({TILE_MAX_ZOOM}) would never be served")
+    asyncio.run(run(args))
+
+if __name__ == "__main__":
+    main()
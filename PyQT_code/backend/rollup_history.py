@@ -0,0 +1,15 @@
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from config import HISTORY_SIMPLIFY_TOLERANCE_M, HISTORY_ROLLUP_AFTER_S
+from database import SessionLocal
+from services.history_rollup import rollup_history
+
+# Simplify stored tracks older than HISTORY_ROLLUP_AFTER_S (run from cron or by hand)
+db = SessionLocal()
+try:
+    examined, deleted = rollup_history(db)
+finally:
+    db.close()
+print(f"✅ Rolled up history older than {HISTORY_ROLLUP_AFTER_S:.0f}s at {HISTORY_SIMPLIFY_TOLERANCE_M} m tolerance: "
+      f"{deleted} of {examined} rows removed.")
@@ -1,14 +1,34 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, HTTPException
 from fastapi import Query
 
 # Handle both relative and absolute imports
 try:
-    from ..services.charging_service import get_nearest_station
+    from ..config import CHARGER_SEARCH_RADIUS_KM
+    from ..models import CorridorRequest
+    from ..services import polyline
+    from ..services.charging_service import get_nearest_station, get_stations_nearby, get_stations_along_route
 except ImportError:
-    from services.charging_service import get_nearest_station
+    from config import CHARGER_SEARCH_RADIUS_KM
+    from models import CorridorRequest
+    from services import polyline
+    from services.charging_service import get_nearest_station, get_stations_nearby, get_stations_along_route
 
 router = APIRouter()
 
 @router.get("/")
-def fetch_charger(lat: float = Query(...), lng: float = Query(...)):
-    return get_nearest_station(lat, lng)
+async def fetch_charger(lat: float = Query(...), lng: float = Query(...)):
+    station = await get_nearest_station(lat, lng)
+    if station is None:
+        raise HTTPException(status_code=503, detail="Charging station lookup unavailable, retry later")
+    return station
+
+@router.get("/nearby")
+async def fetch_chargers_nearby(lat: float = Query(...), lng: float = Query(...),
+                                k: int = Query(10, ge=1, le=500),
+                                radius_km: float = Query(CHARGER_SEARCH_RADIUS_KM, gt=0, le=500)):
+    return await get_stations_nearby(lat, lng, k, radius_km)
+
+@router.post("/corridor")
+async def fetch_chargers_along_route(data: CorridorRequest):
+    coordinates = polyline.decode(data.geometry, data.precision) if isinstance(data.geometry, str) else data.geometry
+    return await get_stations_along_route(coordinates, data.bufferKm, data.limit)
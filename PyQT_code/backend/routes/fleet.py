@@ -0,0 +1,32 @@
+from fastapi import APIRouter, HTTPException, Query
+from typing import Optional
+
+# Handle both relative and absolute imports
+try:
+    from ..config import FLEET_QUERY_LIMIT
+    from ..services.fleet_state import fleet_state
+except ImportError:
+    from config import FLEET_QUERY_LIMIT
+    from services.fleet_state import fleet_state
+
+router = APIRouter()
+
+@router.get("/bbox")
+def vehicles_in_bbox(min_lat: float = Query(...), min_lng: float = Query(...),
+                     max_lat: float = Query(...), max_lng: float = Query(...),
+                     max_age_s: Optional[float] = Query(None, gt=0),
+                     limit: int = Query(FLEET_QUERY_LIMIT, ge=1, le=100_000)):
+    return fleet_state.in_bbox(min_lat, min_lng, max_lat, max_lng, max_age_s, limit)
+
+@router.get("/low-battery")
+def vehicles_below_battery(below: float = Query(..., ge=0, le=100),
+                           max_age_s: Optional[float] = Query(None, gt=0),
+                           limit: int = Query(FLEET_QUERY_LIMIT, ge=1, le=100_000)):
+    return fleet_state.below_battery(below, max_age_s, limit)
+
+@router.get("/{vehicle_id}")
+def vehicle_state(vehicle_id: str):
+    vehicle = fleet_state.get(vehicle_id)
+    if vehicle is None:
+        raise HTTPException(status_code=404, detail="Unknown vehicle")
+    return vehicle
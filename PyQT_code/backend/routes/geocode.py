@@ -0,0 +1,15 @@
+from fastapi import APIRouter, Query
+from typing import Optional
+
+# Handle both relative and absolute imports
+try:
+    from ..services.geocoding_service import geocode
+except ImportError:
+    from services.geocoding_service import geocode
+
+router = APIRouter()
+
+@router.get("/")
+async def search_places(q: str = Query(..., min_length=1), lat: Optional[float] = Query(None),
+                        lng: Optional[float] = Query(None), limit: int = Query(5, ge=1, le=50)):
+    return await geocode(q, lat, lng, limit)
@@ -0,0 +1,145 @@
+import csv
+import io
+import json
+import zlib
+from datetime import datetime
+from typing import Literal, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy import and_, or_, select
+from sqlalchemy.orm import Session
+
+# Handle both relative and absolute imports
+try:
+    from ..config import (HISTORY_PAGE_SIZE, HISTORY_PAGE_MAX, HISTORY_MAX_POINTS_LIMIT,
+                          HISTORY_EXPORT_CHUNK_ROWS, HISTORY_EXPORT_GZIP_LEVEL)
+    from ..database import get_db, SessionLocal
+    from ..models import RouteHistory, from_epoch_ms
+    from ..services.downsample import lttb
+except ImportError:
+    from config import (HISTORY_PAGE_SIZE, HISTORY_PAGE_MAX, HISTORY_MAX_POINTS_LIMIT,
+                        HISTORY_EXPORT_CHUNK_ROWS, HISTORY_EXPORT_GZIP_LEVEL)
+    from database import get_db, SessionLocal
+    from models import RouteHistory, from_epoch_ms
+    from services.downsample import lttb
+
+router = APIRouter()
+
+COLUMNS = (RouteHistory.id, RouteHistory.timestamp, RouteHistory.lat, RouteHistory.lng, RouteHistory.battery)
+
+def _encode_cursor(row):
+    return f"{row.timestamp.isoformat()}|{row.id}"
+
+def _decode_cursor(cursor):
+    try:
+        ts, row_id = cursor.rsplit("|", 1)
+        return datetime.fromisoformat(ts), int(row_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Malformed cursor")
+
+def _point(row):
+    return {"id": row.id, "timestamp": row.timestamp.isoformat(), "lat": row.lat, "lng": row.lng, "battery": row.battery}
+
+EXPORT_COLUMNS = (RouteHistory.id, RouteHistory.timestamp, RouteHistory.vehicle_id, RouteHistory.lat,
+                  RouteHistory.lng, RouteHistory.battery)
+EXPORT_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+def _filtered(query, vehicle_id, start, end):
+    if vehicle_id is not None:
+        query = query.where(RouteHistory.vehicle_id == vehicle_id)
+    if start is not None:
+        query = query.where(RouteHistory.timestamp >= from_epoch_ms(start))
+    if end is not None:
+        query = query.where(RouteHistory.timestamp < from_epoch_ms(end))
+    return query.order_by(RouteHistory.timestamp, RouteHistory.id)
+
+@router.get("/")
+def fetch_history(vehicle_id: Optional[str] = Query(None),
+                  start: Optional[int] = Query(None, description="Milliseconds since epoch, inclusive"),
+                  end: Optional[int] = Query(None, description="Milliseconds since epoch, exclusive"),
+                  cursor: Optional[str] = Query(None, description="nextCursor from the previous page"),
+                  limit: int = Query(HISTORY_PAGE_SIZE, ge=1, le=HISTORY_PAGE_MAX),
+                  max_points: Optional[int] = Query(None, ge=3, le=HISTORY_MAX_POINTS_LIMIT),
+                  db: Session = Depends(get_db)):
+    """RouteHistory in (timestamp, id) order.
+
+    Without `max_points` results are keyset-paginated: pass `nextCursor` back as
+    `cursor` for the following page. With `max_points` the whole range is reduced
+    server-side to that many points (LTTB on battery over time) in one response.
+    """
+    query = _filtered(select(*COLUMNS), vehicle_id, start, end)
+
+    if max_points is not None:
+        rows = db.execute(query).all()
+        if len(rows) > max_points:
+            keep = lttb([r.timestamp.timestamp() for r in rows], [r.battery or 0 for r in rows], max_points)
+            sampled = [rows[i] for i in keep]
+        else:
+            sampled = rows
+        return {"points": [_point(r) for r in sampled], "total": len(rows), "downsampled": len(sampled) < len(rows)}
+
+    if cursor is not None:
+        ts, row_id = _decode_cursor(cursor)
+        query = query.where(or_(RouteHistory.timestamp > ts, and_(RouteHistory.timestamp == ts, RouteHistory.id > row_id)))
+    rows = db.execute(query.limit(limit + 1)).all()
+    page = rows[:limit]
+    return {"points": [_point(r) for r in page],
+            "nextCursor": _encode_cursor(page[-1]) if len(rows) > limit else None}
+
+def _encode_ndjson(rows):
+    return "".join(json.dumps({"id": r.id, "timestamp": r.timestamp.isoformat(), "vehicleId": r.vehicle_id,
+                               "lat": r.lat, "lng": r.lng, "battery": r.battery}) + "\n" for r in rows)
+
+def _encode_csv(rows, header=False):
+    out = io.StringIO()
+    writer = csv.writer(out, lineterminator="\n")
+    if header:
+        writer.writerow(["id", "timestamp", "vehicle_id", "lat", "lng", "battery"])
+    writer.writerows((r.id, r.timestamp.isoformat(), r.vehicle_id, r.lat, r.lng, r.battery) for r in rows)
+    return out.getvalue()
+
+def _export_chunks(query, fmt, gzip):
+    """Encoded (and optionally gzipped) export, one fetched chunk of rows at a time.
+
+    Runs in Starlette's threadpool. It owns its session because request-scoped
+    dependencies are closed before a streaming body is sent.
+    """
+    compressor = zlib.compressobj(HISTORY_EXPORT_GZIP_LEVEL, zlib.DEFLATED, 31) if gzip else None  # 31: gzip framing
+    db = SessionLocal()
+    try:
+        # stream_results asks the driver for a server-side cursor; yield_per bounds what is held in memory.
+        result = db.execute(query.execution_options(stream_results=True, yield_per=HISTORY_EXPORT_CHUNK_ROWS))
+        header = fmt == "csv"
+        for rows in result.partitions():
+            data = (_encode_csv(rows, header) if fmt == "csv" else _encode_ndjson(rows)).encode()
+            header = False
+            if compressor:
+                data = compressor.compress(data)
+            if data:
+                yield data
+        if compressor:
+            yield compressor.flush()
+    finally:
+        db.close()
+
+@router.get("/export")
+def export_history(request: Request,
+                   format: Literal["ndjson", "csv"] = Query("ndjson"),
+                   compression: Literal["auto", "gzip", "none"] = Query(
+                       "auto", description="auto: gzip Content-Encoding when the client accepts it; gzip: a .gz file"),
+                   vehicle_id: Optional[str] = Query(None),
+                   start: Optional[int] = Query(None, description="Milliseconds since epoch, inclusive"),
+                   end: Optional[int] = Query(None, description="Milliseconds since epoch, exclusive")):
+    """Streams every matching RouteHistory row in (timestamp, id) order with constant memory use."""
+    query = _filtered(select(*EXPORT_COLUMNS), vehicle_id, start, end)
+    filename = f"route-history-{vehicle_id or 'all'}.{format}"
+    headers = {}
+    media_type = EXPORT_MEDIA_TYPES[format]
+    if compression == "gzip":
+        media_type, filename = "application/gzip", filename + ".gz"
+    gzip = compression == "gzip" or (compression == "auto" and "gzip" in request.headers.get("accept-encoding", ""))
+    if gzip and compression == "auto":
+        headers["Content-Encoding"] = "gzip"
+        headers["Vary"] = "Accept-Encoding"
+    headers["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return StreamingResponse(_export_chunks(query, format, gzip), media_type=media_type, headers=headers)
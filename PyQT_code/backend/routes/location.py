@@ -1,33 +1,72 @@
-from fastapi import APIRouter, Depends
+import asyncio
+import time
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
 # Handle both relative and absolute imports
 try:
-    from ..models import LocationIn, RouteHistory
-    from ..database import SessionLocal
-    from ..services.charging_service import get_nearest_station
+    from ..models import LocationIn, LocationBatch, RouteHistory, route_history_row, from_epoch_ms
+    from ..database import get_db
+    from ..services.battery_rules import battery_rules
+    from ..services.write_behind import history_buffer, BufferFull
+    from ..services.fleet_state import fleet_state
+    from ..services.metrics import db_commit_latency
 except ImportError:
-    from models import LocationIn, RouteHistory
-    from database import SessionLocal
-    from services.charging_service import get_nearest_station
+    from models import LocationIn, LocationBatch, RouteHistory, route_history_row, from_epoch_ms
+    from database import get_db
+    from services.battery_rules import battery_rules
+    from services.write_behind import history_buffer, BufferFull
+    from services.fleet_state import fleet_state
+    from services.metrics import db_commit_latency
 
 router = APIRouter()
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+def _save_rows(db, rows):
+    # One executemany INSERT and one commit for the whole batch.
+    started = time.perf_counter()
+    db.execute(insert(RouteHistory), rows)
+    db.commit()
+    db_commit_latency.observe(time.perf_counter() - started, "batch")
 
 @router.post("/update")
-def update_location(data: LocationIn, db: Session = Depends(get_db)):
-    entry = RouteHistory(lat=data.lat, lng=data.lng, battery=data.batteryLevel)
-    db.add(entry)
-    db.commit()
+async def update_location(data: LocationIn):
+    # Queued for the write-behind flusher; the response does not wait for the commit.
+    try:
+        history_buffer.put(route_history_row(data.lat, data.lng, data.batteryLevel, vehicle_id=data.vehicleId))
+    except BufferFull:
+        raise HTTPException(status_code=503, detail="Location history buffer is full, retry later")
+    if data.vehicleId:
+        fleet_state.update(data.vehicleId, data.lat, data.lng, data.batteryLevel, data.speed)
+    return await battery_rules.evaluate(data.vehicleId, data.lat, data.lng, data.batteryLevel)
+
+@router.post("/batch")
+async def update_location_batch(data: LocationBatch, db: Session = Depends(get_db)):
+    rows = [
+        route_history_row(fix.lat, fix.lng, fix.batteryLevel, from_epoch_ms(fix.timestamp), fix.vehicleId or data.vehicleId)
+        for fix in data.fixes
+    ]
+    # The session is synchronous, keep the commit off the event loop.
+    await run_in_threadpool(_save_rows, db, rows)
+
+    # Only each vehicle's newest fix matters for its fleet position and low-battery decision.
+    newest = {}
+    for fix in data.fixes:
+        vehicle_id = fix.vehicleId or data.vehicleId
+        if vehicle_id not in newest or fix.timestamp > newest[vehicle_id].timestamp:
+            newest[vehicle_id] = fix
+    for vehicle_id, fix in newest.items():
+        if vehicle_id:
+            fleet_state.update(vehicle_id, fix.lat, fix.lng, fix.batteryLevel, fix.speed)
+    decisions = await asyncio.gather(*(battery_rules.evaluate(vehicle_id, fix.lat, fix.lng, fix.batteryLevel)
+                                       for vehicle_id, fix in newest.items()))
+    by_vehicle = dict(zip(newest, decisions))
+    # Top-level fields describe the newest fix of the batch, as for single-vehicle uploads.
+    latest = max(data.fixes, key=lambda fix: fix.timestamp)
+    return {"accepted": len(rows), **by_vehicle[latest.vehicleId or data.vehicleId],
+            "vehicles": {vehicle_id: decision for vehicle_id, decision in by_vehicle.items() if vehicle_id}}
 
-    if data.batteryLevel < 25:
-        station = get_nearest_station(data.lat, data.lng)
-        return {"redirectToChargingStation": True, "station": station}
-    
-    return {"redirectToChargingStation": False}
+@router.get("/buffer")
+def buffer_stats():
+    return history_buffer.stats()
@@ -0,0 +1,64 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+# Handle both relative and absolute imports
+try:
+    from ..services.metrics import registry
+    from ..services.write_behind import history_buffer
+    from ..services.route_cache import route_cache
+    from ..services.fleet_state import fleet_state
+    from ..services.weather_service import weather_cache
+    from ..services.battery_rules import battery_rules
+    from ..services import single_flight, http_client
+    from ..services.tile_cache import tile_stores
+except ImportError:
+    from services.metrics import registry
+    from services.write_behind import history_buffer
+    from services.route_cache import route_cache
+    from services.fleet_state import fleet_state
+    from services.weather_service import weather_cache
+    from services.battery_rules import battery_rules
+    from services import single_flight, http_client
+    from services.tile_cache import tile_stores
+
+router = APIRouter()
+
+# Queue depths and component totals are read only when scraped.
+registry.gauge_func("history_buffer_pending_rows", "RouteHistory rows accepted but not yet committed.",
+                    lambda: history_buffer.pending)
+registry.gauge_func("history_buffer_capacity_rows", "Write-behind buffer capacity.", lambda: history_buffer.capacity)
+registry.counter_func("history_buffer_flushed_rows_total", "RouteHistory rows committed by the write-behind flusher.",
+                      lambda: history_buffer.flushed)
+registry.counter_func("history_buffer_failed_flushes_total", "Write-behind flushes that failed.",
+                      lambda: history_buffer.failed_flushes)
+registry.counter_func("history_buffer_dropped_rows_total", "RouteHistory rows dropped after failing on their own.",
+                      lambda: history_buffer.dropped)
+registry.gauge_func("route_cache_entries", "Routes held in the route cache.", lambda: route_cache.stats()["entries"])
+registry.gauge_func("route_cache_bytes", "Approximate size of the route cache.", lambda: route_cache.size_bytes)
+registry.counter_func("route_cache_lookups_total", "Route cache lookups by result.",
+                      lambda: {("hit",): route_cache.hits, ("miss",): route_cache.misses}, ("result",))
+registry.gauge_func("fleet_vehicles", "Vehicles in the live fleet table.", lambda: len(fleet_state))
+registry.gauge_func("weather_refreshes_in_flight", "Weather fetches currently running.",
+                    lambda: weather_cache.in_flight)
+registry.counter_func("battery_rule_evaluations_total", "Low-battery rule evaluations by whether a charger lookup ran.",
+                      lambda: {("lookup",): battery_rules.lookups, ("cached",): battery_rules.cached}, ("result",))
+registry.gauge_func("battery_rule_vehicles", "Vehicles with low-battery rule state.", lambda: len(battery_rules))
+registry.counter_func("singleflight_calls_total", "Calls into a request-coalescing group.",
+                      lambda: {(g.name,): g.calls for g in single_flight.groups()}, ("group",))
+registry.counter_func("singleflight_coalesced_total", "Calls that joined an identical call already in flight.",
+                      lambda: {(g.name,): g.coalesced for g in single_flight.groups()}, ("group",))
+registry.counter_func("tile_cache_lookups_total", "Map tile cache lookups by style and result.",
+                      lambda: {key: value for name, store in tile_stores().items()
+                               for key, value in (((name, "hit"), store.hits), ((name, "miss"), store.misses))},
+                      ("style", "result"))
+registry.gauge_func("tile_cache_bytes", "Bytes of map tiles stored per style.",
+                    lambda: {(name,): store.size_bytes for name, store in tile_stores().items()}, ("style",))
+registry.gauge_func("upstream_circuit_open", "1 while an upstream's circuit breaker is open or half open.",
+                    lambda: {(name,): int(state != "closed") for name, state in http_client.breaker_states().items()},
+                    ("upstream",))
+registry.gauge_func("singleflight_in_flight", "Distinct coalesced calls currently running.",
+                    lambda: {(g.name,): g.in_flight for g in single_flight.groups()}, ("group",))
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
@@ -4,12 +4,18 @@ from fastapi import APIRouter
 try:
     from ..models import RouteRequest
     from ..services.routing_service import get_route
+    from ..services.route_cache import route_cache
 except ImportError:
     from models import RouteRequest
     from services.routing_service import get_route
+    from services.route_cache import route_cache
 
 router = APIRouter()
 
 @router.post("/")
-def fetch_route(data: RouteRequest):
-    return get_route(data.start, data.end)
+async def fetch_route(data: RouteRequest):
+    return await get_route(data.start, data.end, data.geometryFormat)
+
+@router.get("/cache")
+def route_cache_stats():
+    return route_cache.stats()
@@ -0,0 +1,71 @@
+import asyncio
+import json
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+from pydantic import ValidationError
+
+# Handle both relative and absolute imports
+try:
+    from ..models import TelemetryFrame, route_history_row, from_epoch_ms
+    from ..services.battery_rules import battery_rules
+    from ..services.write_behind import history_buffer, BufferFull
+    from ..services.fleet_state import fleet_state
+    from ..services import deadline
+    from ..config import LOCATION_BUDGET_S
+except ImportError:
+    from models import TelemetryFrame, route_history_row, from_epoch_ms
+    from services.battery_rules import battery_rules
+    from services.write_behind import history_buffer, BufferFull
+    from services.fleet_state import fleet_state
+    from services import deadline
+    from config import LOCATION_BUDGET_S
+
+router = APIRouter()
+
+@router.websocket("/telemetry")
+async def telemetry(ws: WebSocket):
+    """Long-lived location/battery stream.
+
+    Each text message is one frame (`{"lat", "lng", "batteryLevel", "vehicleId"?, "speed"?, "timestamp"?}`) or a
+    JSON array of frames, possibly from several vehicles. The server only writes back when a
+    vehicle's charging decision changes, so a vehicle streaming every second gets no per-fix
+    reply traffic. Replies for a named vehicle carry its `vehicleId`.
+    """
+    await ws.accept()
+    last_sent = {}  # vehicle_id -> last decision written back
+    try:
+        while True:
+            message = await ws.receive_text()
+            try:
+                payload = json.loads(message)
+                frames = [TelemetryFrame.model_validate(f) for f in (payload if isinstance(payload, list) else [payload])]
+            except (ValueError, ValidationError) as e:
+                await ws.send_json({"error": f"Invalid frame: {e}"})
+                continue
+            if not frames:
+                continue
+
+            rows = [route_history_row(f.lat, f.lng, f.batteryLevel, from_epoch_ms(f.timestamp) if f.timestamp else None, f.vehicleId)
+                    for f in frames]
+            try:
+                history_buffer.extend(rows)
+            except BufferFull:
+                await ws.send_json({"error": "Location history buffer is full, frames dropped"})
+
+            # Only each vehicle's newest frame matters; later frames win ties.
+            newest = {}
+            for f in frames:
+                if f.vehicleId not in newest or (f.timestamp or 0) >= (newest[f.vehicleId].timestamp or 0):
+                    newest[f.vehicleId] = f
+            for vehicle_id, f in newest.items():
+                if vehicle_id:
+                    fleet_state.update(vehicle_id, f.lat, f.lng, f.batteryLevel, f.speed)
+            # Same budget per frame as a POST /api/location/update.
+            with deadline.budget(LOCATION_BUDGET_S):
+                decisions = await asyncio.gather(*(battery_rules.evaluate(vehicle_id, f.lat, f.lng, f.batteryLevel)
+                                                   for vehicle_id, f in newest.items()))
+            for vehicle_id, decision in zip(newest, decisions):
+                if decision != last_sent.get(vehicle_id):
+                    await ws.send_json({**decision, "vehicleId": vehicle_id} if vehicle_id else decision)
+                    last_sent[vehicle_id] = decision
+    except WebSocketDisconnect:
+        pass
@@ -0,0 +1,32 @@
+from fastapi import APIRouter, Header, HTTPException, Response
+from typing import Optional
+
+# Handle both relative and absolute imports
+try:
+    from ..config import TILE_STYLES, TILE_MAX_ZOOM, TILE_BROWSER_MAX_AGE_S
+    from ..services import http_client
+    from ..services.tile_cache import get_tile, TileUnavailable
+except ImportError:
+    from config import TILE_STYLES, TILE_MAX_ZOOM, TILE_BROWSER_MAX_AGE_S
+    from services import http_client
+    from services.tile_cache import get_tile, TileUnavailable
+
+router = APIRouter()
+
+@router.get("/{style}/{z}/{x}/{y}")
+async def map_tile(style: str, z: int, x: int, y: int, if_none_match: Optional[str] = Header(None)):
+    if style not in TILE_STYLES:
+        raise HTTPException(status_code=404, detail=f"Unknown tile style, expected one of {', '.join(TILE_STYLES)}")
+    if not (0 <= z <= TILE_MAX_ZOOM and 0 <= x < (1 << z) and 0 <= y < (1 << z)):
+        raise HTTPException(status_code=404, detail="No such tile")
+    try:
+        found = await get_tile(style, z, x, y)
+    except http_client.UPSTREAM_ERRORS + (TileUnavailable,) as e:
+        raise HTTPException(status_code=502, detail=f"Tile not cached and the tile server failed: {e}")
+    if found is None:
+        raise HTTPException(status_code=404, detail="No such tile")
+    data, etag = found
+    headers = {"ETag": f'"{etag}"', "Cache-Control": f"public, max-age={TILE_BROWSER_MAX_AGE_S}"}
+    if if_none_match and f'"{etag}"' in if_none_match:
+        return Response(status_code=304, headers=headers)
+    return Response(content=data, media_type="image/png", headers=headers)
@@ -0,0 +1,103 @@
+import math
+import time
+from bisect import bisect_right
+from collections import OrderedDict
+
+# Handle both relative and absolute imports
+try:
+    from ..config import (LOW_BATTERY_THRESHOLD, LOW_BATTERY_BANDS, LOW_BATTERY_HYSTERESIS,
+                          LOW_BATTERY_RECOMPUTE_M, LOW_BATTERY_RETRY_S, LOW_BATTERY_RULES_MAX_VEHICLES)
+    from .charging_service import get_nearest_station
+except ImportError:
+    from config import (LOW_BATTERY_THRESHOLD, LOW_BATTERY_BANDS, LOW_BATTERY_HYSTERESIS,
+                        LOW_BATTERY_RECOMPUTE_M, LOW_BATTERY_RETRY_S, LOW_BATTERY_RULES_MAX_VEHICLES)
+    from services.charging_service import get_nearest_station
+
+METRES_PER_DEG = 111320.0
+
+def _distance_m(lat1, lng1, lat2, lng2):
+    # Equirectangular approximation; exact enough at recompute distances of a few km.
+    dx = (lng2 - lng1) * math.cos(math.radians((lat1 + lat2) / 2))
+    return METRES_PER_DEG * math.hypot(lat2 - lat1, dx)
+
+
+class _VehicleRules:
+    __slots__ = ("band", "lat", "lng", "decision", "retry_at")
+
+    def __init__(self):
+        self.band, self.lat, self.lng, self.decision, self.retry_at = 0, None, None, None, None
+
+
+class BatteryRuleEngine:
+    """Per-vehicle low-battery decisions that are only recomputed when something relevant changed.
+
+    The battery is classified into bands by descending `thresholds` (band 0 is "not low").
+    A vehicle drops into a lower band as soon as it crosses a threshold but only climbs back
+    once it is `hysteresis` points above it, so a reading hovering around 25% does not flap.
+    The charger lookup runs when the band changes or the vehicle has moved more than
+    `recompute_m` from where the last recommendation was made; otherwise the cached
+    decision is returned. "No station nearby" is cached like any other answer; a lookup
+    that failed (`lookup` returned None) is retried once `retry_s` has passed. Each
+    update is a dict lookup and a few comparisons.
+    """
+
+    def __init__(self, lookup=get_nearest_station, thresholds=None, hysteresis=LOW_BATTERY_HYSTERESIS,
+                 recompute_m=LOW_BATTERY_RECOMPUTE_M, retry_s=LOW_BATTERY_RETRY_S,
+                 max_vehicles=LOW_BATTERY_RULES_MAX_VEHICLES):
+        thresholds = thresholds or (LOW_BATTERY_THRESHOLD,) + LOW_BATTERY_BANDS
+        self.thresholds = sorted(set(thresholds))  # ascending, for bisect
+        self.lookup, self.hysteresis, self.recompute_m, self.retry_s = lookup, hysteresis, recompute_m, retry_s
+        self.max_vehicles = max_vehicles
+        self._vehicles = OrderedDict()  # vehicle_id -> _VehicleRules, least recently updated first
+        self.lookups = self.cached = 0
+
+    def __len__(self):
+        return len(self._vehicles)
+
+    def _below(self, battery):
+        # Number of thresholds the reading is under.
+        return len(self.thresholds) - bisect_right(self.thresholds, battery)
+
+    def band(self, battery, previous=0):
+        band = self._below(battery)
+        if band < previous:
+            # Climbing back needs the hysteresis margin on every threshold passed.
+            band = min(previous, self._below(battery - self.hysteresis))
+        return band
+
+    async def _decide(self, band, lat, lng):
+        """(decision, answered); answered is False when the charger lookup failed."""
+        if band == 0:
+            return {"redirectToChargingStation": False}, True
+        self.lookups += 1
+        station = await self.lookup(lat, lng)
+        return {"redirectToChargingStation": True, "station": station or {}}, station is not None
+
+    async def evaluate(self, vehicle_id, lat, lng, battery):
+        """Charging decision for one update. Without a `vehicle_id` there is no state to keep,
+        so the rules are applied from scratch."""
+        if not vehicle_id:
+            return (await self._decide(self.band(battery), lat, lng))[0]
+
+        state = self._vehicles.get(vehicle_id)
+        if state is None:
+            state = self._vehicles[vehicle_id] = _VehicleRules()
+            if len(self._vehicles) > self.max_vehicles:
+                self._vehicles.popitem(last=False)
+        else:
+            self._vehicles.move_to_end(vehicle_id)
+
+        band = self.band(battery, state.band)
+        if state.decision is not None and band == state.band and (
+                band == 0 or _distance_m(state.lat, state.lng, lat, lng) <= self.recompute_m) and (
+                state.retry_at is None or time.monotonic() < state.retry_at):
+            self.cached += 1
+            return state.decision
+
+        decision, answered = await self._decide(band, lat, lng)
+        state.band, state.lat, state.lng, state.decision = band, lat, lng, decision
+        state.retry_at = None if answered else time.monotonic() + self.retry_s
+        return decision
+
+
+battery_rules = BatteryRuleEngine()
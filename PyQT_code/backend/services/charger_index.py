@@ -0,0 +1,91 @@
+import json
+import os
+import threading
+import numpy as np
+
+# Handle both relative and absolute imports
+try:
+    from ..config import CHARGER_DUMP_PATH, CHARGER_GRID_DEG
+    from .spatial_index import GridIndex, SegmentIndex
+except ImportError:
+    from config import CHARGER_DUMP_PATH, CHARGER_GRID_DEG
+    from services.spatial_index import GridIndex, SegmentIndex
+
+
+class ChargerIndex:
+    """In-memory charging station store: flat NumPy columns behind a GridIndex."""
+
+    def __init__(self, lats, lngs, ids, names, cell_deg=CHARGER_GRID_DEG):
+        self.grid = GridIndex(lats, lngs, cell_deg)
+        order = self.grid.order
+        self.lats, self.lngs = self.grid.lats, self.grid.lngs
+        self.ids = np.asarray(ids, dtype=np.int64)[order]
+        self.names = [names[i] for i in order]
+
+    def __len__(self):
+        return len(self.lats)
+
+    @classmethod
+    def from_ocm(cls, pois, cell_deg=CHARGER_GRID_DEG):
+        lats, lngs, ids, names = [], [], [], []
+        for poi in pois:
+            info = poi.get("AddressInfo") or {}
+            lat, lng = info.get("Latitude"), info.get("Longitude")
+            if lat is None or lng is None:
+                continue
+            lats.append(lat); lngs.append(lng)
+            ids.append(poi.get("ID") or info.get("ID") or 0)
+            names.append(info.get("Title") or "")
+        return cls(lats, lngs, ids, names, cell_deg)
+
+    @classmethod
+    def load(cls, path, cell_deg=CHARGER_GRID_DEG):
+        with open(path, "r", encoding="utf-8") as f:
+            return cls.from_ocm(json.load(f), cell_deg)
+
+    def _result(self, idx, dist):
+        return [
+            {"id": int(self.ids[i]), "name": self.names[i], "lat": float(self.lats[i]),
+             "lon": float(self.lngs[i]), "distance_km": round(float(d), 3)}
+            for i, d in zip(idx, dist)
+        ]
+
+    def within_radius(self, lat, lng, radius_km, limit=None):
+        """All stations within `radius_km` of the point, nearest first."""
+        return self._result(*self.grid.within_radius(lat, lng, radius_km, limit))
+
+    def nearest(self, lat, lng, k=1, max_km=None):
+        """The `k` nearest stations, optionally capped at `max_km`, nearest first."""
+        return self._result(*self.grid.nearest(lat, lng, k, max_km))
+
+    def along_route(self, coordinates, buffer_km, limit=None):
+        """Stations within `buffer_km` of a [[lng, lat], ...] polyline, ordered by distance along it."""
+        coords = np.asarray(coordinates, dtype=np.float64).reshape(-1, 2)
+        if len(coords) < 2 or not len(self):
+            return []
+        segments = SegmentIndex(coords[:, 1], coords[:, 0], self.grid, buffer_km)
+        idx = self.grid.candidates(segments.keys)
+        dist, along = segments.locate(self.lats[idx], self.lngs[idx])
+        keep = dist <= buffer_km
+        idx, dist, along = idx[keep], dist[keep], along[keep]
+        order = np.argsort(along, kind="stable")[:limit]
+        found = self._result(idx[order], dist[order])
+        for station, km in zip(found, along[order]):
+            station["along_km"] = round(float(km), 3)
+        return found
+
+
+_index = None
+_index_lock = threading.Lock()
+
+def get_charger_index():
+    """Returns the process-wide index, loading the dump on first use. None if no dump is available."""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                if not os.path.exists(CHARGER_DUMP_PATH):
+                    return None
+                _index = ChargerIndex.load(CHARGER_DUMP_PATH)
+                print(f"Loaded {len(_index)} charging stations from {CHARGER_DUMP_PATH}")
+    return _index
@@ -1,9 +1,91 @@
-import requests
+from collections import OrderedDict
 
-def get_nearest_station(lat, lng):
-    url = f"https://api.openchargemap.io/v3/poi/?output=json&latitude={lat}&longitude={lng}&distance=5&key=DEMO"
-    res = requests.get(url)
-    if res.status_code == 200 and res.json():
+# Handle both relative and absolute imports
+try:
+    from ..config import CHARGER_SEARCH_RADIUS_KM, CHARGER_COALESCE_GRID_M, OCM_API_URL, OCM_API_KEY
+    from .charger_index import ChargerIndex, get_charger_index
+    from .single_flight import SingleFlight
+    from .simplify import simplify_coords
+    from . import http_client, polyline
+except ImportError:
+    from config import CHARGER_SEARCH_RADIUS_KM, CHARGER_COALESCE_GRID_M, OCM_API_URL, OCM_API_KEY
+    from services.charger_index import ChargerIndex, get_charger_index
+    from services.single_flight import SingleFlight
+    from services.simplify import simplify_coords
+    from services import http_client, polyline
+
+nearest_station_flight = SingleFlight("nearest_station")
+_COALESCE_STEP_DEG = CHARGER_COALESCE_GRID_M / 111_320.0
+# Last live answer per cell, served while OpenChargeMap is slow, failing or circuit-broken.
+_recent_stations = OrderedDict()
+_RECENT_STATIONS_MAX = 10_000
+
+async def get_nearest_station(lat, lng):
+    """Nearest station within CHARGER_SEARCH_RADIUS_KM, {} when there is none, or None when
+    OpenChargeMap could not answer and there is no earlier answer for the area."""
+    # The local index is authoritative once loaded; the live API is only used without a dump.
+    index = get_charger_index()
+    if index is not None:
+        found = index.nearest(lat, lng, k=1, max_km=CHARGER_SEARCH_RADIUS_KM)
+        return found[0] if found else {}
+    return await _coalesced_nearest_station(lat, lng)
+
+async def get_stations_nearby(lat, lng, k=10, radius_km=CHARGER_SEARCH_RADIUS_KM):
+    index = get_charger_index()
+    if index is not None:
+        return index.within_radius(lat, lng, radius_km, limit=k)
+    station = await _coalesced_nearest_station(lat, lng)
+    return [station] if station else []
+
+async def get_stations_along_route(coordinates, buffer_km, limit=None):
+    """Stations within `buffer_km` of a [[lng, lat], ...] route, ordered by distance along it."""
+    index = get_charger_index()
+    if index is None:
+        # OCM filters by polyline server side; a throwaway index does the ordering.
+        index = ChargerIndex.from_ocm(await _fetch_corridor_pois(coordinates, buffer_km))
+    return index.along_route(coordinates, buffer_km, limit)
+
+async def _fetch_corridor_pois(coordinates, buffer_km):
+    # Coarsen the line so the encoded polyline stays well inside URL length limits.
+    line = polyline.encode(simplify_coords(coordinates, max(buffer_km * 250, 50)), 5)
+    params = {"output": "json", "polyline": line, "distance": buffer_km, "distanceunit": "KM",
+              "maxresults": 1000, "key": OCM_API_KEY}
+    try:
+        res = await http_client.get(OCM_API_URL, upstream="openchargemap", hedge=True, params=params)
+    except http_client.UPSTREAM_ERRORS:
+        return []
+    return res.json() if res.status_code == 200 else []
+
+async def _coalesced_nearest_station(lat, lng):
+    # Callers in the same cell get the answer for whichever of them asked first.
+    key = (round(lat / _COALESCE_STEP_DEG), round(lng / _COALESCE_STEP_DEG))
+    try:
+        return await nearest_station_flight.do(key, _nearest_station_or_recent, key, lat, lng)
+    except http_client.DeadlineExceeded:
+        # Out of budget before the shared lookup finished; it still refreshes the cell for later callers.
+        return _recent_stations.get(key)
+
+async def _nearest_station_or_recent(key, lat, lng):
+    try:
+        station = await _fetch_nearest_station(lat, lng)
+    except http_client.UPSTREAM_ERRORS:
+        return _recent_stations.get(key)
+    if station is None:
+        return _recent_stations.get(key)
+    _recent_stations[key] = station
+    _recent_stations.move_to_end(key)
+    if len(_recent_stations) > _RECENT_STATIONS_MAX:
+        _recent_stations.popitem(last=False)
+    return station
+
+async def _fetch_nearest_station(lat, lng):
+    """Nearest station from OpenChargeMap, {} when there is none, None when the API errored."""
+    params = {"output": "json", "latitude": lat, "longitude": lng,
+              "distance": CHARGER_SEARCH_RADIUS_KM, "distanceunit": "KM", "key": OCM_API_KEY}
+    res = await http_client.get(OCM_API_URL, upstream="openchargemap", hedge=True, params=params)
+    if res.status_code != 200:
+        return None
+    if res.json():
         top = res.json()[0]
         return {
             "name": top["AddressInfo"]["Title"],
@@ -0,0 +1,60 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# Absolute time.monotonic() by which the current request must be answered; None means no limit.
+_deadline = ContextVar("deadline", default=None)
+
+
+class DeadlineExceeded(Exception):
+    pass
+
+
+def remaining():
+    """Seconds left in the current request's budget, or None outside any budget."""
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+@contextmanager
+def budget(seconds):
+    """Runs the block under a budget of `seconds`, or what is left of an enclosing one if that is less."""
+    deadline = time.monotonic() + seconds
+    current = _deadline.get()
+    token = _deadline.set(deadline if current is None else min(current, deadline))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+@contextmanager
+def detached():
+    """Runs the block outside any budget, for work shared by callers whose budgets differ."""
+    token = _deadline.set(None)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+class DeadlineMiddleware:
+    """Pure ASGI middleware giving every HTTP request a latency budget.
+
+    `budgets` maps path prefixes to seconds; other paths get `default_s`. Upstream
+    calls made while handling the request only get what is left of it.
+    """
+
+    def __init__(self, app, default_s, budgets=None):
+        self.app, self.default_s = app, default_s
+        self.budgets = sorted((budgets or {}).items(), key=lambda item: -len(item[0]))
+
+    def _budget(self, path):
+        for prefix, seconds in self.budgets:
+            if path.startswith(prefix):
+                return seconds
+        return self.default_s
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        with budget(self._budget(scope["path"])):
+            await self.app(scope, receive, send)
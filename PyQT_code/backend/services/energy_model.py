@@ -0,0 +1,186 @@
+import os
+import threading
+import numpy as np
+
+# Handle both relative and absolute imports
+try:
+    from .. import config
+    from .geo import haversine_km
+except ImportError:
+    import config
+    from services.geo import haversine_km
+
+GRAVITY = 9.81
+AIR_DENSITY = 1.225  # kg/m^3 at sea level
+
+
+class VehicleParams:
+    """Physical parameters of the vehicle; every field defaults to its VEHICLE_* setting."""
+
+    def __init__(self, mass_kg=None, cda_m2=None, crr=None, drivetrain_eff=None, regen_eff=None,
+                 aux_power_w=None, battery_kwh=None, cruise_kmh=None, accel_ms2=None, decel_ms2=None,
+                 lateral_accel_ms2=None):
+        pick = lambda value, default: default if value is None else value
+        self.mass_kg = pick(mass_kg, config.VEHICLE_MASS_KG)
+        self.cda_m2 = pick(cda_m2, config.VEHICLE_CDA_M2)
+        self.crr = pick(crr, config.VEHICLE_CRR)
+        self.drivetrain_eff = pick(drivetrain_eff, config.VEHICLE_DRIVETRAIN_EFF)
+        self.regen_eff = pick(regen_eff, config.VEHICLE_REGEN_EFF)
+        self.aux_power_w = pick(aux_power_w, config.VEHICLE_AUX_POWER_W)
+        self.battery_kwh = pick(battery_kwh, config.VEHICLE_BATTERY_KWH)
+        self.cruise_kmh = pick(cruise_kmh, config.VEHICLE_CRUISE_KMH)
+        self.accel_ms2 = pick(accel_ms2, config.VEHICLE_ACCEL_MS2)
+        self.decel_ms2 = pick(decel_ms2, config.VEHICLE_DECEL_MS2)
+        self.lateral_accel_ms2 = pick(lateral_accel_ms2, config.VEHICLE_LATERAL_ACCEL_MS2)
+
+
+class ElevationModel:
+    """Elevation raster read from an ESRI ASCII grid, sampled bilinearly."""
+
+    def __init__(self, grid, xll, yll, cellsize):
+        self.grid = grid  # row 0 is the northern edge
+        self.xll, self.yll, self.cellsize = xll, yll, cellsize
+
+    @classmethod
+    def load(cls, path):
+        header = {}
+        with open(path, "r", encoding="utf-8") as f:
+            for _ in range(6):
+                key, value = f.readline().split()
+                header[key.lower()] = float(value)
+            grid = np.loadtxt(f, dtype=np.float64).reshape(int(header["nrows"]), int(header["ncols"]))
+        if "nodata_value" in header:
+            grid[grid == header["nodata_value"]] = np.nan
+        cellsize = header["cellsize"]
+        # Cell-centre registration is normalised to corner registration.
+        xll = header.get("xllcorner", header.get("xllcenter", 0) - cellsize / 2)
+        yll = header.get("yllcorner", header.get("yllcenter", 0) - cellsize / 2)
+        return cls(grid, xll, yll, cellsize)
+
+    def sample(self, lats, lngs):
+        """Elevations in metres; NaN outside the raster or on no-data cells."""
+        nrows, ncols = self.grid.shape
+        x = (np.asarray(lngs) - self.xll) / self.cellsize - 0.5
+        y = nrows - 0.5 - (np.asarray(lats) - self.yll) / self.cellsize
+        inside = (x >= -0.5) & (x <= ncols - 0.5) & (y >= -0.5) & (y <= nrows - 0.5)
+        x, y = np.clip(x, 0, ncols - 1), np.clip(y, 0, nrows - 1)
+        x0 = np.minimum(x.astype(np.int64), max(ncols - 2, 0))
+        y0 = np.minimum(y.astype(np.int64), max(nrows - 2, 0))
+        x1, y1 = np.minimum(x0 + 1, ncols - 1), np.minimum(y0 + 1, nrows - 1)
+        fx, fy = x - x0, y - y0
+        top = self.grid[y0, x0] * (1 - fx) + self.grid[y0, x1] * fx
+        bottom = self.grid[y1, x0] * (1 - fx) + self.grid[y1, x1] * fx
+        return np.where(inside, top * (1 - fy) + bottom * fy, np.nan)
+
+
+class EnergyProfile:
+    """Per-point arrays along a route: distance, speed, time, elevation and cumulative battery energy."""
+
+    def __init__(self, distance_km, speed_kmh, elapsed_s, elevation_m, energy_kwh, battery_kwh):
+        self.distance_km, self.speed_kmh, self.elapsed_s = distance_km, speed_kmh, elapsed_s
+        self.elevation_m, self.energy_kwh, self.battery_kwh = elevation_m, energy_kwh, battery_kwh
+
+    def __len__(self):
+        return len(self.distance_km)
+
+    def soc(self, start_pct):
+        """Predicted State of Charge (%) at every point when leaving with `start_pct`."""
+        return np.clip(start_pct - self.energy_kwh / self.battery_kwh * 100, 0, 100)
+
+    def index_at(self, elapsed_s):
+        """Index of the last point reached after `elapsed_s` seconds of driving."""
+        return int(np.searchsorted(self.elapsed_s, elapsed_s, side="right")) - 1
+
+    def first_below(self, soc_curve, threshold_pct):
+        """Index where `soc_curve` first drops below `threshold_pct`, or None if it never does."""
+        below = np.flatnonzero(soc_curve < threshold_pct)
+        return int(below[0]) if below.size else None
+
+
+def _fill_gaps(values):
+    # Linear interpolation over NaN runs; flat where nothing is known.
+    known = np.isfinite(values)
+    if not known.any():
+        return np.zeros_like(values)
+    positions = np.arange(len(values))
+    return np.interp(positions, positions[known], values[known])
+
+def _speed_profile(step_m, turn_rad, params):
+    """Node speeds (m/s): cruise, capped in corners, with acceleration and braking limits, stopped at both ends.
+
+    The limits v_i^2 <= v_j^2 + 2a(s_i - s_j) over all earlier (later, for braking) j
+    reduce to running minima, so both passes are single NumPy scans.
+    """
+    s = np.concatenate(([0.0], np.cumsum(step_m)))
+    # Corner radius from the turn angle spread over the adjoining segments.
+    radius = np.full(len(s), np.inf)
+    radius[1:-1] = (step_m[:-1] + step_m[1:]) / 2 / np.maximum(turn_rad, 1e-6)
+    cap = np.minimum((params.cruise_kmh / 3.6) ** 2, params.lateral_accel_ms2 * radius)
+    cap[0] = cap[-1] = 0.0
+    a, d = params.accel_ms2, params.decel_ms2
+    accel = np.minimum.accumulate(cap - 2 * a * s) + 2 * a * s
+    brake = np.minimum.accumulate((cap + 2 * d * s)[::-1])[::-1] - 2 * d * s
+    return np.sqrt(np.maximum(np.minimum(accel, brake), 0.0))
+
+def build_profile(coordinates, params=None, elevation=None):
+    """Energy profile of a [[lng, lat], ...] route in one vectorised pass.
+
+    Longitudinal model per segment: rolling resistance, grade, aerodynamic drag and
+    inertia at the wheel, divided by drivetrain efficiency when driving and scaled by
+    regen efficiency when braking or descending, plus auxiliary load over the
+    segment's travel time. `elevation` defaults to the configured DEM, if any.
+    """
+    params = params or VehicleParams()
+    coords = np.asarray(coordinates, dtype=np.float64).reshape(-1, 2)
+    lngs, lats = coords[:, 0], coords[:, 1]
+    n = len(coords)
+    if n < 2:
+        zeros = np.zeros(n)
+        return EnergyProfile(zeros, zeros, zeros, zeros, zeros, params.battery_kwh)
+
+    step_m = haversine_km(lats[:-1], lngs[:-1], lats[1:], lngs[1:]) * 1000
+    heading = np.arctan2((lngs[1:] - lngs[:-1]) * np.cos(np.radians(lats[:-1])), lats[1:] - lats[:-1])
+    turn_rad = np.abs((np.diff(heading) + np.pi) % (2 * np.pi) - np.pi)
+    speed = _speed_profile(step_m, turn_rad, params)
+
+    elevation = elevation if elevation is not None else get_elevation_model()
+    height = _fill_gaps(elevation.sample(lats, lngs)) if elevation is not None else np.zeros(n)
+
+    v0, v1 = speed[:-1], speed[1:]
+    moving = step_m > 0
+    safe_step = np.where(moving, step_m, 1.0)
+    dt = np.where(moving, step_m / np.maximum((v0 + v1) / 2, 1e-3), 0.0)
+    accel = np.where(moving, (v1 ** 2 - v0 ** 2) / (2 * safe_step), 0.0)
+    slope = np.arctan2(np.diff(height), safe_step)
+    force = (params.mass_kg * GRAVITY * (params.crr * np.cos(slope) + np.sin(slope))
+             + 0.5 * AIR_DENSITY * params.cda_m2 * (v0 ** 2 + v1 ** 2) / 2
+             + params.mass_kg * accel)
+    wheel_j = force * step_m
+    battery_j = np.where(wheel_j > 0, wheel_j / params.drivetrain_eff, wheel_j * params.regen_eff)
+    battery_j += params.aux_power_w * dt
+
+    return EnergyProfile(
+        distance_km=np.concatenate(([0.0], np.cumsum(step_m))) / 1000,
+        speed_kmh=speed * 3.6,
+        elapsed_s=np.concatenate(([0.0], np.cumsum(dt))),
+        elevation_m=height,
+        energy_kwh=np.concatenate(([0.0], np.cumsum(battery_j))) / 3.6e6,
+        battery_kwh=params.battery_kwh,
+    )
+
+
+_elevation = None
+_elevation_loaded = False
+_elevation_lock = threading.Lock()
+
+def get_elevation_model():
+    """Returns the process-wide DEM, reading it on first use. None if no DEM is configured."""
+    global _elevation, _elevation_loaded
+    if not _elevation_loaded:
+        with _elevation_lock:
+            if not _elevation_loaded:
+                if os.path.exists(config.ELEVATION_DEM_PATH):
+                    _elevation = ElevationModel.load(config.ELEVATION_DEM_PATH)
+                    print(f"Loaded {_elevation.grid.shape[1]}x{_elevation.grid.shape[0]} DEM from {config.ELEVATION_DEM_PATH}")
+                _elevation_loaded = True
+    return _elevation
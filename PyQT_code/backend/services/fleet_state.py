@@ -0,0 +1,85 @@
+import threading
+import time
+import numpy as np
+
+# Handle both relative and absolute imports
+try:
+    from ..config import FLEET_INITIAL_CAPACITY, FLEET_QUERY_LIMIT
+except ImportError:
+    from config import FLEET_INITIAL_CAPACITY, FLEET_QUERY_LIMIT
+
+
+class FleetState:
+    """Latest position/battery/speed of every live vehicle, one row per vehicle.
+
+    Columns are preallocated NumPy arrays (doubled when full) so fleet-wide
+    queries are a single vectorised mask instead of a Python loop or a DB scan.
+    """
+
+    def __init__(self, capacity=FLEET_INITIAL_CAPACITY):
+        self._lock = threading.Lock()
+        self._rows = {}  # vehicle_id -> row
+        self._ids = []   # row -> vehicle_id
+        self._alloc(capacity)
+
+    def _alloc(self, capacity):
+        def grow(old, dtype):
+            new = np.full(capacity, np.nan, dtype=dtype)
+            if old is not None:
+                new[:old.size] = old
+            return new
+        self.lat = grow(getattr(self, "lat", None), np.float64)
+        self.lng = grow(getattr(self, "lng", None), np.float64)
+        self.battery = grow(getattr(self, "battery", None), np.float32)
+        self.speed = grow(getattr(self, "speed", None), np.float32)
+        self.last_seen = grow(getattr(self, "last_seen", None), np.float64)
+
+    def __len__(self):
+        return len(self._ids)
+
+    def update(self, vehicle_id, lat, lng, battery, speed=None):
+        # last_seen is server receive time on every path, so max_age_s never compares client clocks.
+        with self._lock:
+            row = self._rows.get(vehicle_id)
+            if row is None:
+                row = len(self._ids)
+                if row == self.lat.size:
+                    self._alloc(self.lat.size * 2)
+                self._rows[vehicle_id] = row
+                self._ids.append(vehicle_id)
+            self.lat[row], self.lng[row], self.battery[row] = lat, lng, battery
+            self.speed[row] = np.nan if speed is None else speed
+            self.last_seen[row] = time.time()
+
+    def _record(self, row):
+        speed = self.speed[row]
+        return {"vehicleId": self._ids[row], "lat": float(self.lat[row]), "lng": float(self.lng[row]),
+                "batteryLevel": float(self.battery[row]), "speed": None if np.isnan(speed) else float(speed),
+                "lastSeen": float(self.last_seen[row])}
+
+    def get(self, vehicle_id):
+        with self._lock:
+            row = self._rows.get(vehicle_id)
+            return None if row is None else self._record(row)
+
+    def _select(self, mask, max_age_s, limit):
+        n = len(self._ids)
+        if max_age_s is not None:
+            mask &= self.last_seen[:n] >= time.time() - max_age_s
+        rows = np.flatnonzero(mask)
+        return {"total": int(rows.size), "vehicles": [self._record(r) for r in rows[:limit]]}
+
+    def in_bbox(self, min_lat, min_lng, max_lat, max_lng, max_age_s=None, limit=FLEET_QUERY_LIMIT):
+        with self._lock:
+            n = len(self._ids)
+            lat, lng = self.lat[:n], self.lng[:n]
+            mask = (lat >= min_lat) & (lat <= max_lat) & (lng >= min_lng) & (lng <= max_lng)
+            return self._select(mask, max_age_s, limit)
+
+    def below_battery(self, threshold, max_age_s=None, limit=FLEET_QUERY_LIMIT):
+        with self._lock:
+            n = len(self._ids)
+            return self._select(self.battery[:n] < threshold, max_age_s, limit)
+
+
+fleet_state = FleetState()
@@ -0,0 +1,23 @@
+import math
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0088
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    """Great-circle distance in km. Works on scalars or NumPy arrays."""
+    lat1, lng1, lat2, lng2 = map(np.radians, (lat1, lng1, lat2, lng2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+def km_to_lat_deg(km):
+    return km / 111.32
+
+def km_to_lng_deg(km, lat):
+    return km / (111.32 * max(math.cos(math.radians(lat)), 1e-6))
+
+def grid_cols(cell_deg):
+    return int(math.ceil(360.0 / cell_deg)) + 1
+
+def grid_cell(lat, lng, cell_deg):
+    """Integer id of the `cell_deg` lat/lng grid cell containing the point."""
+    return math.floor((lat + 90.0) / cell_deg) * grid_cols(cell_deg) + math.floor((lng + 180.0) / cell_deg)
@@ -0,0 +1,202 @@
+import csv
+import json
+import math
+import os
+import re
+import sys
+import threading
+import unicodedata
+import xml.etree.ElementTree as ET
+from bisect import bisect_left
+import numpy as np
+
+# Handle both relative and absolute imports
+try:
+    from ..config import GEOCODER_PLACES_PATH, GEOCODER_DISTANCE_WEIGHT
+    from .geo import haversine_km
+except ImportError:
+    from config import GEOCODER_PLACES_PATH, GEOCODER_DISTANCE_WEIGHT
+    from services.geo import haversine_km
+
+# Prior importance by OSM place/amenity type when the extract carries none.
+TYPE_IMPORTANCE = {"city": 1.0, "town": 0.8, "suburb": 0.6, "village": 0.5, "quarter": 0.5,
+                   "neighbourhood": 0.4, "hamlet": 0.3, "locality": 0.3}
+DEFAULT_IMPORTANCE = 0.35
+NAME_PREFIX_BONUS = 0.5  # the query's first word starts the place's name
+_TOKEN_RE = re.compile(r"[0-9a-z]+")
+# OSM keys whose values say what kind of place a named node is.
+_OSM_TYPE_KEYS = ("place", "amenity", "shop", "tourism", "railway", "aeroway", "leisure", "building")
+
+def tokenize(text):
+    """Lowercase ASCII words of `text`; accents are folded, punctuation separates words."""
+    folded = unicodedata.normalize("NFKD", text or "").encode("ascii", "ignore").decode("ascii").lower()
+    return _TOKEN_RE.findall(folded)
+
+
+class Geocoder:
+    """Prefix search over place names.
+
+    Every (word, place) pair sits in one sorted token list, so all words starting with a
+    prefix are one contiguous slice found with two bisects; the matching place ids are
+    the same slice of a flat NumPy postings array. Multi-word queries intersect the
+    slices, smallest first, and ranking (importance, name-prefix bonus, distance to
+    the caller) is vectorised over the candidates.
+    """
+
+    def __init__(self, names, lats, lngs, kinds=None, importance=None, addresses=None):
+        n = len(names)
+        self.names = list(names)
+        self.kinds = list(kinds) if kinds is not None else [""] * n
+        self.addresses = list(addresses) if addresses is not None else [""] * n
+        self.lats = np.asarray(lats, dtype=np.float64)
+        self.lngs = np.asarray(lngs, dtype=np.float64)
+        if importance is None:
+            importance = [TYPE_IMPORTANCE.get(k, DEFAULT_IMPORTANCE) for k in self.kinds]
+        self.importance = np.asarray(importance, dtype=np.float32)
+        # Ranking runs over every candidate, so it reads compact float32 copies.
+        self._lat32, self._lng32 = self.lats.astype(np.float32), self.lngs.astype(np.float32)
+
+        pairs, first = [], []
+        for i, (name, address) in enumerate(zip(self.names, self.addresses)):
+            words = tokenize(name)
+            first.append(words[0] if words else "")
+            pairs.extend((sys.intern(w), i) for w in set(words + tokenize(address)))
+        pairs.sort()
+        self.tokens = [w for w, _ in pairs]
+        self.postings = np.fromiter((i for _, i in pairs), dtype=np.int32, count=len(pairs))
+        # Position of each place's first name word in the token list, for the name-prefix bonus.
+        self.first_pos = np.array([bisect_left(pairs, (w, i)) if w else -1 for i, w in enumerate(first)], dtype=np.int32)
+
+    def __len__(self):
+        return len(self.names)
+
+    @classmethod
+    def from_rows(cls, rows):
+        names, lats, lngs, kinds, importance, addresses = [], [], [], [], [], []
+        for row in rows:
+            name = (row.get("name") or "").strip()
+            lat, lng = row.get("lat"), row.get("lon", row.get("lng"))
+            if not name or lat in (None, "") or lng in (None, ""):
+                continue
+            kind = row.get("type") or ""
+            names.append(name); lats.append(float(lat)); lngs.append(float(lng)); kinds.append(kind)
+            value = row.get("importance")
+            importance.append(float(value) if value not in (None, "") else TYPE_IMPORTANCE.get(kind, DEFAULT_IMPORTANCE))
+            addresses.append(row.get("address") or "")
+        return cls(names, lats, lngs, kinds, importance, addresses)
+
+    @classmethod
+    def from_csv(cls, path):
+        """CSV with a header: name, lat, lon (or lng), and optional type, importance, address."""
+        with open(path, "r", encoding="utf-8", newline="") as f:
+            return cls.from_rows(csv.DictReader(f))
+
+    @classmethod
+    def from_geojson(cls, path):
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        rows = []
+        for feature in data.get("features", []):
+            geometry = feature.get("geometry") or {}
+            if geometry.get("type") != "Point":
+                continue
+            lng, lat = geometry["coordinates"][:2]
+            rows.append({**(feature.get("properties") or {}), "lat": lat, "lon": lng})
+        return cls.from_rows(rows)
+
+    @classmethod
+    def from_osm_xml(cls, path):
+        """Named nodes of an OSM XML extract; addr:street/addr:city become the address."""
+        rows = []
+        for _, elem in ET.iterparse(path, events=("end",)):
+            if elem.tag == "node":
+                tags = {t.get("k"): t.get("v") for t in elem.iter("tag")}
+                if tags.get("name"):
+                    kind = next((tags[k] for k in _OSM_TYPE_KEYS if k in tags), "")
+                    address = ", ".join(tags[k] for k in ("addr:street", "addr:city") if tags.get(k))
+                    rows.append({"name": tags["name"], "lat": elem.get("lat"), "lon": elem.get("lon"),
+                                 "type": kind, "address": address})
+                elem.clear()
+            elif elem.tag in ("way", "relation"):
+                elem.clear()
+        return cls.from_rows(rows)
+
+    @classmethod
+    def load(cls, path):
+        ext = os.path.splitext(path)[1].lower()
+        if ext == ".osm":
+            return cls.from_osm_xml(path)
+        if ext in (".json", ".geojson"):
+            return cls.from_geojson(path)
+        return cls.from_csv(path)
+
+    def _range(self, prefix):
+        return bisect_left(self.tokens, prefix), bisect_left(self.tokens, prefix + "\x7f")
+
+    def search(self, query, lat=None, lng=None, limit=5):
+        """Places whose words start with every word of `query`, best first, as Nominatim-style dicts."""
+        terms = tokenize(query)
+        if not terms or not len(self):
+            return []
+        ranges = [self._range(t) for t in terms]
+        first_lo, first_hi = ranges[0]
+        ranges.sort(key=lambda r: r[1] - r[0])
+        candidates = self.postings[ranges[0][0]:ranges[0][1]]
+        for lo, hi in ranges[1:]:
+            if not candidates.size:
+                break
+            # A scatter into a per-place mask is linear, unlike sorting the slice for np.isin.
+            matches = np.zeros(len(self), dtype=bool)
+            matches[self.postings[lo:hi]] = True
+            candidates = candidates[matches[candidates]]
+        if not candidates.size:
+            return []
+
+        first = self.first_pos[candidates]
+        score = self.importance[candidates] + np.float32(NAME_PREFIX_BONUS) * ((first >= first_lo) & (first < first_hi))
+        near = lat is not None and lng is not None
+        if near:
+            # Equirectangular distance is plenty for ranking; reported distances are exact.
+            dx = (self._lng32[candidates] - np.float32(lng)) * np.float32(111.32 * math.cos(math.radians(lat)))
+            dy = (self._lat32[candidates] - np.float32(lat)) * np.float32(110.574)
+            score -= np.float32(GEOCODER_DISTANCE_WEIGHT) * np.log1p(np.sqrt(dx * dx + dy * dy))
+        # A place can match a prefix through several of its words, so keep spares for de-duplication.
+        keep = min(limit * 4, candidates.size)
+        top = np.argpartition(-score, keep - 1)[:keep] if keep < candidates.size else np.arange(candidates.size)
+        top = top[np.argsort(-score[top], kind="stable")]
+
+        results, seen = [], set()
+        for j in top:
+            i = int(candidates[j])
+            if i in seen:
+                continue
+            seen.add(i)
+            results.append(self._result(i, haversine_km(lat, lng, self.lats[i], self.lngs[i]) if near else None))
+            if len(results) == limit:
+                break
+        return results
+
+    def _result(self, i, dist):
+        name, address = self.names[i], self.addresses[i]
+        result = {"place_id": i, "name": name, "display_name": f"{name}, {address}" if address else name,
+                  "lat": str(self.lats[i]), "lon": str(self.lngs[i]), "type": self.kinds[i],
+                  "importance": round(float(self.importance[i]), 3)}
+        if dist is not None:
+            result["distance_km"] = round(float(dist), 3)
+        return result
+
+
+_geocoder = None
+_geocoder_lock = threading.Lock()
+
+def get_geocoder():
+    """Returns the process-wide geocoder, loading the places extract on first use. None without an extract."""
+    global _geocoder
+    if _geocoder is None:
+        with _geocoder_lock:
+            if _geocoder is None:
+                if not os.path.exists(GEOCODER_PLACES_PATH):
+                    return None
+                _geocoder = Geocoder.load(GEOCODER_PLACES_PATH)
+                print(f"Loaded {len(_geocoder)} places from {GEOCODER_PLACES_PATH}")
+    return _geocoder
@@ -0,0 +1,28 @@
+# Handle both relative and absolute imports
+try:
+    from ..config import NOMINATIM_URL, GEOCODER_COUNTRY_CODES
+    from .geocoder import get_geocoder
+    from . import http_client
+except ImportError:
+    from config import NOMINATIM_URL, GEOCODER_COUNTRY_CODES
+    from services.geocoder import get_geocoder
+    from services import http_client
+
+async def geocode(query, lat=None, lng=None, limit=5):
+    """Places matching `query` as Nominatim-style results, nearest-biased when the caller's position is known."""
+    geocoder = get_geocoder()
+    if geocoder is not None:
+        return geocoder.search(query, lat, lng, limit)
+    return await _fetch_nominatim(query, lat, lng, limit)
+
+async def _fetch_nominatim(query, lat, lng, limit):
+    params = {"q": query, "format": "json", "limit": limit}
+    if GEOCODER_COUNTRY_CODES:
+        params["countrycodes"] = GEOCODER_COUNTRY_CODES
+    if lat is not None and lng is not None:
+        params["viewbox"] = f"{lng - 1},{lat + 1},{lng + 1},{lat - 1}"  # preferred, not a hard bound
+    try:
+        res = await http_client.get(NOMINATIM_URL, upstream="nominatim", params=params)
+    except http_client.UPSTREAM_ERRORS:
+        return []
+    return res.json() if res.status_code == 200 else []
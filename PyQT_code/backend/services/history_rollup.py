@@ -0,0 +1,69 @@
+from datetime import datetime, timedelta
+import numpy as np
+from sqlalchemy import delete, select
+
+# Handle both relative and absolute imports
+try:
+    from ..config import HISTORY_SIMPLIFY_TOLERANCE_M, HISTORY_ROLLUP_AFTER_S, HISTORY_TRIP_GAP_S, HISTORY_BATTERY_DELTA
+    from ..models import RouteHistory
+    from .simplify import douglas_peucker_mask
+except ImportError:
+    from config import HISTORY_SIMPLIFY_TOLERANCE_M, HISTORY_ROLLUP_AFTER_S, HISTORY_TRIP_GAP_S, HISTORY_BATTERY_DELTA
+    from models import RouteHistory
+    from services.simplify import douglas_peucker_mask
+
+DELETE_CHUNK = 500  # stays under SQLite's bound-parameter limit
+
+def _trip_slices(timestamps, gap_s):
+    """Splits a time-ordered track wherever consecutive fixes are more than `gap_s` apart."""
+    if len(timestamps) < 2:
+        return [slice(0, len(timestamps))]
+    gaps = np.diff(np.array(timestamps, dtype="datetime64[us]")) > np.timedelta64(int(gap_s * 1e6), "us")
+    bounds = [0, *(np.flatnonzero(gaps) + 1).tolist(), len(timestamps)]
+    return [slice(a, b) for a, b in zip(bounds, bounds[1:])]
+
+def _keep_battery_changes(keep, batteries, delta):
+    """Also keeps every fix whose battery differs by `delta` or more from the previously kept fix."""
+    last = None
+    for i, battery in enumerate(batteries):
+        if battery is None:
+            continue
+        if last is not None and abs(battery - last) >= delta:
+            keep[i] = True
+        if keep[i]:
+            last = battery
+    return keep
+
+def rollup_history(db, older_than_s=HISTORY_ROLLUP_AFTER_S, tolerance_m=HISTORY_SIMPLIFY_TOLERANCE_M,
+                   trip_gap_s=HISTORY_TRIP_GAP_S, battery_delta=HISTORY_BATTERY_DELTA):
+    """Douglas-Peucker-simplifies every vehicle's stored track older than `older_than_s`.
+
+    Each trip keeps its first and last fix; points within `tolerance_m` of the
+    simplified line are deleted unless the battery has changed by `battery_delta`
+    since the last kept fix, so the state-of-charge curve survives the rollup.
+    Returns (rows examined, rows deleted).
+    """
+    cutoff = datetime.utcnow() - timedelta(seconds=older_than_s)
+    vehicles = db.execute(select(RouteHistory.vehicle_id).where(RouteHistory.timestamp < cutoff).distinct()).scalars().all()
+    examined = deleted = 0
+    for vehicle_id in vehicles:
+        rows = db.execute(
+            select(RouteHistory.id, RouteHistory.lng, RouteHistory.lat, RouteHistory.battery, RouteHistory.timestamp)
+            .where(RouteHistory.vehicle_id.is_(None) if vehicle_id is None else RouteHistory.vehicle_id == vehicle_id,
+                   RouteHistory.timestamp < cutoff)
+            .order_by(RouteHistory.timestamp, RouteHistory.id)
+        ).all()
+        examined += len(rows)
+        drop = []
+        for trip in _trip_slices([r.timestamp for r in rows], trip_gap_s):
+            track = rows[trip]
+            if len(track) < 3:
+                continue
+            keep = douglas_peucker_mask([(r.lng, r.lat) for r in track], tolerance_m)
+            keep = _keep_battery_changes(keep, [r.battery for r in track], battery_delta)
+            drop.extend(r.id for r, k in zip(track, keep) if not k)
+        for i in range(0, len(drop), DELETE_CHUNK):
+            db.execute(delete(RouteHistory).where(RouteHistory.id.in_(drop[i:i + DELETE_CHUNK])))
+        db.commit()
+        deleted += len(drop)
+    return examined, deleted
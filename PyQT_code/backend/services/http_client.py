@@ -0,0 +1,226 @@
+import asyncio
+import time
+from collections import deque
+from urllib.parse import urlsplit
+import httpx
+
+# Handle both relative and absolute imports
+try:
+    from ..config import (HTTP_TIMEOUT_S, HTTP_CONNECT_TIMEOUT_S, HTTP_MAX_CONNECTIONS, HTTP_MAX_KEEPALIVE,
+                          HTTP_KEEPALIVE_EXPIRY_S, HTTP_MAX_PER_HOST, HTTP_USER_AGENT, HTTP_HEDGE,
+                          HTTP_HEDGE_MIN_SAMPLES, HTTP_HEDGE_MIN_DELAY_S, CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_RESET_S)
+    from .metrics import upstream_latency, upstream_errors, upstream_hedges
+    from . import deadline
+    from .deadline import DeadlineExceeded
+except ImportError:
+    from config import (HTTP_TIMEOUT_S, HTTP_CONNECT_TIMEOUT_S, HTTP_MAX_CONNECTIONS, HTTP_MAX_KEEPALIVE,
+                        HTTP_KEEPALIVE_EXPIRY_S, HTTP_MAX_PER_HOST, HTTP_USER_AGENT, HTTP_HEDGE,
+                        HTTP_HEDGE_MIN_SAMPLES, HTTP_HEDGE_MIN_DELAY_S, CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_RESET_S)
+    from services.metrics import upstream_latency, upstream_errors, upstream_hedges
+    from services import deadline
+    from services.deadline import DeadlineExceeded
+
+
+class CircuitOpen(Exception):
+    pass
+
+# What callers catch to fall back to cached or indexed data.
+UPSTREAM_ERRORS = (httpx.HTTPError, DeadlineExceeded, CircuitOpen)
+
+
+class CircuitBreaker:
+    """Opens after `threshold` consecutive failures (errors, timeouts, 5xx) and then
+    rejects calls for `reset_s`; after that one trial call decides whether it closes again."""
+
+    def __init__(self, threshold=CIRCUIT_FAILURE_THRESHOLD, reset_s=CIRCUIT_RESET_S):
+        self.threshold, self.reset_s = threshold, reset_s
+        self.failures = self.opens = 0
+        self.opened_at = None
+        self.trial = False
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        return "half_open" if self.trial or time.monotonic() - self.opened_at >= self.reset_s else "open"
+
+    def allow(self):
+        if self.opened_at is None:
+            return True
+        if self.trial or time.monotonic() - self.opened_at < self.reset_s:
+            return False
+        self.trial = True
+        return True
+
+    def record(self, ok):
+        if ok:
+            self.failures, self.opened_at, self.trial = 0, None, False
+            return
+        self.failures += 1
+        if self.trial or (self.opened_at is None and self.failures >= self.threshold):
+            self.opened_at, self.trial = time.monotonic(), False
+            self.opens += 1
+
+    def release(self):
+        # The call was cancelled before it said anything about the upstream.
+        self.trial = False
+
+
+class LatencyWindow:
+    """Durations of the most recent successful calls; the p95 is re-sorted at most every 16 samples."""
+
+    def __init__(self, size=256, min_samples=HTTP_HEDGE_MIN_SAMPLES):
+        self.samples = deque(maxlen=size)
+        self.min_samples = min_samples
+        self._p95, self._stale = None, 0
+
+    def record(self, seconds):
+        self.samples.append(seconds)
+        self._stale += 1
+
+    def p95(self):
+        if len(self.samples) < self.min_samples:
+            return None
+        if self._p95 is None or self._stale >= 16:
+            ordered = sorted(self.samples)
+            self._p95, self._stale = ordered[int(0.95 * (len(ordered) - 1))], 0
+        return self._p95
+
+
+# One pooled client per process: connections to OpenChargeMap/ORS/timeanddate stay alive between calls.
+_client = None
+_host_slots = {}
+_breakers = {}   # upstream -> CircuitBreaker
+_latencies = {}  # upstream -> LatencyWindow
+
+def get_client():
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            timeout=httpx.Timeout(HTTP_TIMEOUT_S, connect=HTTP_CONNECT_TIMEOUT_S),
+            limits=httpx.Limits(max_connections=HTTP_MAX_CONNECTIONS,
+                                max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+                                keepalive_expiry=HTTP_KEEPALIVE_EXPIRY_S),
+            headers={"User-Agent": HTTP_USER_AGENT},
+        )
+    return _client
+
+def _host_slot(url):
+    host = urlsplit(url).netloc
+    slot = _host_slots.get(host)
+    if slot is None:
+        slot = _host_slots[host] = asyncio.Semaphore(HTTP_MAX_PER_HOST)
+    return slot
+
+def _failure_reason(exc):
+    if isinstance(exc, httpx.TimeoutException):
+        return "timeout"
+    if isinstance(exc, httpx.NetworkError):
+        return "network"
+    return "other"
+
+def breaker(upstream):
+    found = _breakers.get(upstream)
+    if found is None:
+        found = _breakers[upstream] = CircuitBreaker()
+    return found
+
+def breaker_states():
+    return {name: b.state for name, b in _breakers.items()}
+
+def _latency(upstream):
+    found = _latencies.get(upstream)
+    if found is None:
+        found = _latencies[upstream] = LatencyWindow()
+    return found
+
+async def _send(method, url, upstream, kwargs):
+    async with _host_slot(url):
+        started = time.perf_counter()
+        try:
+            response = await get_client().request(method, url, **kwargs)
+        except Exception as e:
+            upstream_latency.observe(time.perf_counter() - started, upstream, "error")
+            upstream_errors.inc(upstream, _failure_reason(e))
+            raise
+    elapsed = time.perf_counter() - started
+    upstream_latency.observe(elapsed, upstream, f"{response.status_code // 100}xx")
+    if response.status_code >= 400:
+        upstream_errors.inc(upstream, f"status_{response.status_code // 100}xx")
+    if response.status_code < 500:
+        _latency(upstream).record(elapsed)
+    return response
+
+async def _hedged(send, upstream, delay):
+    # A second attempt once the first has taken longer than `delay`; whichever succeeds first wins.
+    first = asyncio.ensure_future(send())
+    done, _ = await asyncio.wait({first}, timeout=delay)
+    if done:
+        return first.result()
+    upstream_hedges.inc(upstream, "sent")
+    second = asyncio.ensure_future(send())
+    pending = {first, second}
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    if task is second:
+                        upstream_hedges.inc(upstream, "won")
+                    return task.result()
+        return first.result()  # both failed; raise the original attempt's error
+    finally:
+        first.cancel()
+        second.cancel()
+
+async def request(method, url, upstream=None, hedge=False, **kwargs):
+    """Sends a request on the shared client, holding one of the host's connection slots.
+
+    Timings and failures are recorded under `upstream` (the host when not given).
+    The call gets whatever is left of the current request's deadline budget and
+    raises DeadlineExceeded when that runs out, or CircuitOpen without calling out
+    while the upstream's breaker is open. With `hedge` (idempotent requests only) a
+    second attempt is sent once the first is slower than the upstream's recent p95.
+    """
+    upstream = upstream or urlsplit(url).netloc
+    left = deadline.remaining()
+    if left is not None and left <= 0:
+        upstream_errors.inc(upstream, "deadline")
+        raise DeadlineExceeded(f"No time left in the request budget for {upstream}")
+    circuit = breaker(upstream)
+    if not circuit.allow():
+        upstream_errors.inc(upstream, "circuit_open")
+        raise CircuitOpen(f"{upstream} is failing, not calling it for now")
+
+    send = lambda: _send(method, url, upstream, kwargs)
+    delay = _latency(upstream).p95() if hedge and HTTP_HEDGE else None
+    try:
+        call = _hedged(send, upstream, max(delay, HTTP_HEDGE_MIN_DELAY_S)) if delay is not None else send()
+        response = await (asyncio.wait_for(call, left) if left is not None else call)
+    except asyncio.TimeoutError:
+        circuit.record(False)
+        upstream_errors.inc(upstream, "deadline")
+        raise DeadlineExceeded(f"{upstream} did not answer within the request budget") from None
+    except Exception:
+        circuit.record(False)
+        raise
+    except BaseException:
+        circuit.release()
+        raise
+    circuit.record(response.status_code < 500)
+    return response
+
+async def get(url, **kwargs):
+    return await request("GET", url, **kwargs)
+
+async def post(url, **kwargs):
+    return await request("POST", url, **kwargs)
+
+async def close_client():
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+    _host_slots.clear()
+    _breakers.clear()
+    _latencies.clear()
@@ -0,0 +1,174 @@
+import threading
+import time
+from bisect import bisect_left
+
+# Seconds; Prometheus client defaults with a finer low end for in-process work.
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _labels(names, values, extra=""):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name, help, labelnames=()):
+        self.name, self.help, self.labelnames = name, help, tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            values = sorted(self._values.items())
+        for labels, value in values:
+            lines.append(f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}")
+        return lines
+
+
+class Histogram:
+    """Fixed-bucket histogram. `observe` is a bisect and three additions under a lock;
+    buckets are only made cumulative when scraped."""
+
+    def __init__(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name, self.help, self.labelnames = name, help, tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}  # labels -> [per-bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[i] += 1
+            series[-1] += value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            snapshot = {labels: list(series) for labels, series in self._series.items()}
+        for labels, series in sorted(snapshot.items()):
+            total = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series[:-1]):
+                total += count
+                le = 'le="' + _number(bound) + '"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {total}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {_number(series[-1])}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {total}")
+        return lines
+
+
+class GaugeFunc:
+    """Value read from a callback at scrape time, so the request path pays nothing.
+
+    The callback returns a number, or a {label values tuple: number} dict. `kind`
+    is "counter" for totals that components already keep themselves.
+    """
+
+    def __init__(self, name, help, fn, labelnames=(), kind="gauge"):
+        self.name, self.help, self.fn, self.labelnames, self.kind = name, help, fn, tuple(labelnames), kind
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        value = self.fn()
+        items = sorted(value.items()) if isinstance(value, dict) else [((), value)]
+        for labels, number in items:
+            lines.append(f"{self.name}{_labels(self.labelnames, labels)} {_number(number)}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+
+    def register(self, metric):
+        # Re-registering a name replaces it, so reloaded modules do not duplicate series.
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, help, labelnames=()):
+        return self.register(Counter(name, help, labelnames))
+
+    def histogram(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self.register(Histogram(name, help, labelnames, buckets))
+
+    def gauge_func(self, name, help, fn, labelnames=()):
+        return self.register(GaugeFunc(name, help, fn, labelnames))
+
+    def counter_func(self, name, help, fn, labelnames=()):
+        return self.register(GaugeFunc(name, help, fn, labelnames, kind="counter"))
+
+    def render(self):
+        """Prometheus text exposition format 0.0.4."""
+        lines = []
+        for metric in self._metrics.values():
+            try:
+                lines.extend(metric.render())
+            except Exception as e:
+                print(f"ERROR: rendering metric {metric.name} failed: {e}")
+        return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware timing every HTTP request into `request_latency`.
+
+    `routers` maps path prefixes to router labels; unmatched paths are "other".
+    WebSocket sessions are long-lived and are not timed.
+    """
+
+    def __init__(self, app, routers):
+        self.app = app
+        self.routers = sorted(routers.items(), key=lambda item: -len(item[0]))
+
+    def _router(self, path):
+        for prefix, name in self.routers:
+            if path.startswith(prefix):
+                return name
+        return "other"
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        started = time.perf_counter()
+        status = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            request_latency.observe(time.perf_counter() - started, self._router(scope["path"]), scope["method"], str(status[0]))
+
+
+registry = Registry()
+
+request_latency = registry.histogram(
+    "http_request_duration_seconds", "Backend request latency by router.", ("router", "method", "status"))
+upstream_latency = registry.histogram(
+    "upstream_request_duration_seconds", "Outbound HTTP call latency by upstream service.", ("upstream", "outcome"))
+upstream_errors = registry.counter(
+    "upstream_errors_total", "Failed outbound HTTP calls by upstream service and reason.", ("upstream", "reason"))
+upstream_hedges = registry.counter(
+    "upstream_hedged_requests_total", "Hedged second attempts sent, and how many of them answered first.",
+    ("upstream", "outcome"))
+db_commit_latency = registry.histogram(
+    "db_commit_duration_seconds", "Time to insert and commit a batch of rows.", ("writer",))
@@ -0,0 +1,284 @@
+import csv
+import heapq
+import os
+import threading
+import xml.etree.ElementTree as ET
+import numpy as np
+
+# Handle both relative and absolute imports
+try:
+    from ..config import ROAD_GRAPH_PATH, ROUTING_LANDMARKS, ROUTING_SNAP_MAX_KM
+    from .geo import haversine_km
+    from .spatial_index import GridIndex
+except ImportError:
+    from config import ROAD_GRAPH_PATH, ROUTING_LANDMARKS, ROUTING_SNAP_MAX_KM
+    from services.geo import haversine_km
+    from services.spatial_index import GridIndex
+
+INF = float("inf")
+
+# Default free-flow speeds (km/h) for OSM highway classes a car may use.
+HIGHWAY_SPEEDS = {
+    "motorway": 100, "motorway_link": 60, "trunk": 80, "trunk_link": 50,
+    "primary": 60, "primary_link": 40, "secondary": 50, "secondary_link": 35,
+    "tertiary": 40, "tertiary_link": 30, "unclassified": 30, "residential": 25,
+    "living_street": 10, "service": 15, "road": 30,
+}
+DEFAULT_SPEED_KMH = 30
+
+
+def _parse_speed(value, fallback):
+    try:
+        number = float(str(value).split()[0])
+    except (ValueError, IndexError):
+        return fallback
+    return number * 1.609 if "mph" in str(value) else number
+
+def _dijkstra(offsets, targets, weights, source):
+    dist = [INF] * (len(offsets) - 1)
+    dist[source] = 0.0
+    heap = [(0.0, source)]
+    while heap:
+        d, u = heapq.heappop(heap)
+        if d > dist[u]:
+            continue
+        for e in range(offsets[u], offsets[u + 1]):
+            v, nd = targets[e], d + weights[e]
+            if nd < dist[v]:
+                dist[v] = nd
+                heapq.heappush(heap, (nd, v))
+    return dist
+
+
+class RoadGraph:
+    """Directed road graph in CSR form with ALT (A*, Landmarks, Triangle inequality) preprocessing.
+
+    Edge weights are free-flow travel times. For every landmark L the distances
+    d(L, v) and d(v, L) to all nodes are precomputed; at query time they give an
+    admissible, consistent A* heuristic that steers the search toward the target.
+    """
+
+    def __init__(self, lats, lngs, src, dst, length_m, duration_s, landmarks=None):
+        self.lats = np.asarray(lats, dtype=np.float64)
+        self.lngs = np.asarray(lngs, dtype=np.float64)
+        src, dst = np.asarray(src, dtype=np.int64), np.asarray(dst, dtype=np.int64)
+        self.src, self.dst = src, dst
+        self.length_m = np.asarray(length_m, dtype=np.float64)
+        self.duration_s = np.asarray(duration_s, dtype=np.float64)
+        n = len(self.lats)
+        # Plain lists are much faster than NumPy scalars inside the Python search loops.
+        self._fwd = self._csr(src, dst, n)
+        self._bwd = self._csr(dst, src, n)
+        self.grid = GridIndex(self.lats, self.lngs, cell_deg=0.01)
+        self.lm_fwd = self.lm_bwd = None  # (n, k) arrays: d(L, v) and d(v, L)
+        if landmarks is not None:
+            self.lm_fwd, self.lm_bwd = landmarks
+
+    def __len__(self):
+        return len(self.lats)
+
+    def _csr(self, src, dst, n):
+        order = np.argsort(src, kind="stable")
+        offsets = np.zeros(n + 1, dtype=np.int64)
+        np.add.at(offsets, src + 1, 1)
+        return (np.cumsum(offsets).tolist(), dst[order].tolist(), self.duration_s[order].tolist(),
+                order.tolist())
+
+    # --- construction ---
+    @classmethod
+    def from_segments(cls, segments):
+        """`segments` yields (from_lat, from_lng, to_lat, to_lng, speed_kmh, oneway) tuples."""
+        node_ids, lats, lngs, src, dst, speeds = {}, [], [], [], [], []
+
+        def node(lat, lng):
+            key = (round(lat, 7), round(lng, 7))
+            i = node_ids.get(key)
+            if i is None:
+                i = node_ids[key] = len(lats)
+                lats.append(lat); lngs.append(lng)
+            return i
+
+        for from_lat, from_lng, to_lat, to_lng, speed, oneway in segments:
+            u, v = node(from_lat, from_lng), node(to_lat, to_lng)
+            if u == v:
+                continue
+            src.append(u); dst.append(v); speeds.append(speed)
+            if not oneway:
+                src.append(v); dst.append(u); speeds.append(speed)
+        lats, lngs = np.array(lats), np.array(lngs)
+        src, dst = np.array(src, dtype=np.int64), np.array(dst, dtype=np.int64)
+        length_m = haversine_km(lats[src], lngs[src], lats[dst], lngs[dst]) * 1000
+        duration_s = length_m / (np.array(speeds, dtype=np.float64) / 3.6)
+        return cls(lats, lngs, src, dst, length_m, duration_s)
+
+    @classmethod
+    def from_edge_list(cls, path):
+        """CSV with from_lat,from_lng,to_lat,to_lng and optional speed_kmh,oneway columns."""
+        def segments():
+            with open(path, newline="", encoding="utf-8") as f:
+                for row in csv.DictReader(f):
+                    yield (float(row["from_lat"]), float(row["from_lng"]), float(row["to_lat"]), float(row["to_lng"]),
+                           _parse_speed(row.get("speed_kmh"), DEFAULT_SPEED_KMH),
+                           str(row.get("oneway", "")).lower() in ("1", "yes", "true"))
+        return cls.from_segments(segments())
+
+    @staticmethod
+    def _way_segments(refs, tags, coords):
+        highway = tags.get("highway")
+        if highway not in HIGHWAY_SPEEDS:
+            return
+        speed = _parse_speed(tags.get("maxspeed"), HIGHWAY_SPEEDS[highway])
+        oneway = tags.get("oneway", "yes" if highway == "motorway" else "no")
+        if oneway == "-1":
+            refs = refs[::-1]
+        directed = oneway in ("yes", "1", "true", "-1")
+        for a, b in zip(refs, refs[1:]):
+            if a in coords and b in coords:
+                yield (*coords[a], *coords[b], speed, directed)
+
+    @classmethod
+    def from_osm_xml(cls, path):
+        coords, segments = {}, []
+        for _, elem in ET.iterparse(path, events=("end",)):
+            if elem.tag == "node":
+                coords[elem.get("id")] = (float(elem.get("lat")), float(elem.get("lon")))
+                elem.clear()
+            elif elem.tag == "way":
+                refs = [nd.get("ref") for nd in elem.iter("nd")]
+                tags = {t.get("k"): t.get("v") for t in elem.iter("tag")}
+                segments.extend(cls._way_segments(refs, tags, coords))
+                elem.clear()
+        return cls.from_segments(segments)
+
+    @classmethod
+    def from_pbf(cls, path):
+        try:
+            import osmium
+        except ImportError:
+            raise RuntimeError("Reading .pbf extracts needs pyosmium: pip install osmium")
+        segments = []
+
+        class Handler(osmium.SimpleHandler):
+            def way(self, w):
+                coords = {n.ref: (n.location.lat, n.location.lon) for n in w.nodes if n.location.valid()}
+                segments.extend(RoadGraph._way_segments([n.ref for n in w.nodes], dict(w.tags), coords))
+
+        Handler().apply_file(path, locations=True)
+        return cls.from_segments(segments)
+
+    @classmethod
+    def load(cls, path, n_landmarks=ROUTING_LANDMARKS):
+        """Builds (or reads the preprocessed `<path>.alt.npz` next to) a graph from an OSM extract or edge list."""
+        cache = f"{path}.alt.npz"
+        if os.path.exists(cache) and os.path.getmtime(cache) >= os.path.getmtime(path):
+            data = np.load(cache)
+            return cls(data["lats"], data["lngs"], data["src"], data["dst"], data["length_m"], data["duration_s"],
+                       (data["lm_fwd"], data["lm_bwd"]))
+        if path.endswith(".pbf"):
+            graph = cls.from_pbf(path)
+        elif path.endswith((".osm", ".xml")):
+            graph = cls.from_osm_xml(path)
+        else:
+            graph = cls.from_edge_list(path)
+        graph.build_landmarks(n_landmarks)
+        np.savez(cache, lats=graph.lats, lngs=graph.lngs, src=graph.src, dst=graph.dst, length_m=graph.length_m,
+                 duration_s=graph.duration_s, lm_fwd=graph.lm_fwd, lm_bwd=graph.lm_bwd)
+        return graph
+
+    def build_landmarks(self, k):
+        """Farthest-point landmark selection followed by forward and backward Dijkstra from each landmark."""
+        n = len(self)
+        k = min(k, n)
+        fwd, bwd = np.empty((n, k)), np.empty((n, k))
+        closest = np.full(n, INF)
+        landmark = 0
+        for i in range(k):
+            fwd[:, i] = _dijkstra(*self._fwd[:3], landmark)
+            bwd[:, i] = _dijkstra(*self._bwd[:3], landmark)
+            reach = np.where(np.isfinite(fwd[:, i]), fwd[:, i], -1)
+            closest = np.minimum(closest, np.where(reach >= 0, reach, INF))
+            spread = np.where(np.isfinite(closest), closest, -1)
+            landmark = int(np.argmax(spread))
+        self.lm_fwd, self.lm_bwd = fwd, bwd
+
+    # --- queries ---
+    def snap(self, lat, lng, max_km=ROUTING_SNAP_MAX_KM):
+        idx, _ = self.grid.nearest(lat, lng, k=1, max_km=max_km)
+        return int(self.grid.order[idx[0]]) if idx.size else None
+
+    def _heuristic(self, target):
+        if self.lm_fwd is None:
+            return lambda v: 0.0
+        ft, bt = self.lm_fwd[target], self.lm_bwd[target]
+        fwd, bwd = self.lm_fwd, self.lm_bwd
+
+        def h(v):
+            with np.errstate(invalid="ignore"):
+                best = np.fmax.reduce(np.concatenate((ft - fwd[v], bwd[v] - bt)))
+            return best if best > 0 else 0.0
+        return h
+
+    def shortest_path(self, source, target):
+        """(node path, edge ids) of the fastest route, or None when the target is unreachable."""
+        offsets, targets, weights, edge_ids = self._fwd
+        h = self._heuristic(target)
+        g, pred = {source: 0.0}, {source: (-1, -1)}
+        heap = [(h(source), 0.0, source)]
+        while heap:
+            _, d, u = heapq.heappop(heap)
+            if u == target:
+                break
+            if d > g[u]:
+                continue
+            for e in range(offsets[u], offsets[u + 1]):
+                v, nd = targets[e], d + weights[e]
+                if nd < g.get(v, INF):
+                    hv = h(v)
+                    if hv == INF:
+                        continue  # a landmark proves the target is unreachable from v
+                    g[v], pred[v] = nd, (u, edge_ids[e])
+                    heapq.heappush(heap, (nd + hv, nd, v))
+        else:
+            if target != source:
+                return None
+        nodes, edges = [target], []
+        while pred[nodes[-1]][0] != -1:
+            u, e = pred[nodes[-1]]
+            nodes.append(u); edges.append(e)
+        return nodes[::-1], edges[::-1]
+
+    def route(self, start, end):
+        """OSRM-shaped response for `start`/`end` ([lat, lng]) with a GeoJSON LineString geometry."""
+        source, target = self.snap(*start), self.snap(*end)
+        if source is None or target is None:
+            return {"code": "NoSegment", "message": "Could not snap a coordinate to the road graph"}
+        found = self.shortest_path(source, target)
+        if found is None:
+            return {"code": "NoRoute", "message": "No route between the given coordinates"}
+        nodes, edges = found
+        distance = float(self.length_m[edges].sum()) if edges else 0.0
+        duration = float(self.duration_s[edges].sum()) if edges else 0.0
+        coordinates = np.column_stack((self.lngs[nodes], self.lats[nodes])).tolist()
+        leg = {"distance": distance, "duration": duration, "summary": "", "steps": []}
+        return {
+            "code": "Ok",
+            "routes": [{"geometry": {"type": "LineString", "coordinates": coordinates},
+                        "distance": distance, "duration": duration, "legs": [leg]}],
+            "waypoints": [{"location": coordinates[0], "name": ""}, {"location": coordinates[-1], "name": ""}],
+        }
+
+
+_graph = None
+_graph_lock = threading.Lock()
+
+def get_road_graph():
+    """Returns the process-wide graph, building it on first use. None if no extract is configured."""
+    global _graph
+    if _graph is None:
+        with _graph_lock:
+            if _graph is None:
+                if not os.path.exists(ROAD_GRAPH_PATH):
+                    return None
+                _graph = RoadGraph.load(ROAD_GRAPH_PATH)
+                print(f"Loaded road graph with {len(_graph)} nodes from {ROAD_GRAPH_PATH}")
+    return _graph
@@ -0,0 +1,33 @@
+"""Google encoded-polyline codec for [[lng, lat], ...] coordinate lists (GeoJSON order)."""
+import numpy as np
+
+def encode(coords, precision=5):
+    if not len(coords):
+        return ""
+    factor = 10 ** precision
+    # Encoded polylines are lat/lng ordered and store deltas between rounded integer points.
+    points = np.round(np.asarray(coords, dtype=np.float64)[:, ::-1] * factor).astype(np.int64)
+    deltas = np.diff(points, axis=0, prepend=np.zeros((1, 2), dtype=np.int64)).ravel()
+    zigzag = np.where(deltas < 0, ~(deltas << 1), deltas << 1).tolist()
+    out = []
+    for value in zigzag:
+        while value >= 0x20:
+            out.append(chr((0x20 | (value & 0x1f)) + 63))
+            value >>= 5
+        out.append(chr(value + 63))
+    return "".join(out)
+
+def decode(encoded, precision=5):
+    values, value, shift = [], 0, 0
+    for ch in encoded:
+        b = ord(ch) - 63
+        value |= (b & 0x1f) << shift
+        if b < 0x20:
+            values.append(~(value >> 1) if value & 1 else value >> 1)
+            value, shift = 0, 0
+        else:
+            shift += 5
+    if not values:
+        return []
+    points = np.cumsum(np.asarray(values, dtype=np.int64).reshape(-1, 2), axis=0) / 10 ** precision
+    return points[:, ::-1].tolist()
@@ -0,0 +1,100 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+# Handle both relative and absolute imports
+try:
+    from ..config import ROUTE_CACHE_GRID_M, ROUTE_CACHE_MAX_BYTES, ROUTE_CACHE_TTL_S, ROUTE_CACHE_PATH
+except ImportError:
+    from config import ROUTE_CACHE_GRID_M, ROUTE_CACHE_MAX_BYTES, ROUTE_CACHE_TTL_S, ROUTE_CACHE_PATH
+
+METERS_PER_DEG = 111_320.0
+
+
+class RouteCache:
+    """LRU cache of route responses keyed on start/end snapped to a `grid_m` grid.
+
+    Eviction is by the total JSON size of the cached responses; entries also
+    expire `ttl_s` seconds after they were stored.
+    """
+
+    def __init__(self, grid_m=ROUTE_CACHE_GRID_M, max_bytes=ROUTE_CACHE_MAX_BYTES, ttl_s=ROUTE_CACHE_TTL_S):
+        self.step_deg = grid_m / METERS_PER_DEG
+        self.max_bytes, self.ttl_s = max_bytes, ttl_s
+        self._entries = OrderedDict()  # key -> (stored_at, size, value)
+        self._lock = threading.Lock()
+        self.size_bytes = 0
+        self.hits = self.misses = self.evictions = 0
+
+    def key(self, start, end):
+        """`start`/`end` are [lat, lng]; both are snapped to the grid."""
+        snap = lambda p: (round(p[0] / self.step_deg), round(p[1] / self.step_deg))
+        return snap(start) + snap(end)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if time.time() - entry[0] > self.ttl_s:
+                self._drop(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[2]
+
+    def put(self, key, value, stored_at=None):
+        size = len(json.dumps(value, separators=(",", ":")))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (stored_at or time.time(), size, value)
+            self.size_bytes += size
+            while self.size_bytes > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+
+    def _drop(self, key):
+        _, size, _ = self._entries.pop(key)
+        self.size_bytes -= size
+
+    def stats(self):
+        return {"entries": len(self._entries), "sizeBytes": self.size_bytes, "maxBytes": self.max_bytes,
+                "hits": self.hits, "misses": self.misses, "evictions": self.evictions}
+
+    # --- persistence ---
+    def save(self, path):
+        with self._lock:
+            entries = [[list(k), stored_at, value] for k, (stored_at, _, value) in self._entries.items()]
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(entries, f, separators=(",", ":"))
+        os.replace(tmp, path)
+
+    def load(self, path):
+        if not os.path.exists(path):
+            return 0
+        with open(path, "r", encoding="utf-8") as f:
+            entries = json.load(f)
+        now = time.time()
+        for key, stored_at, value in entries:  # oldest first, so LRU order is preserved
+            if now - stored_at <= self.ttl_s:
+                self.put(tuple(key), value, stored_at)
+        return len(self._entries)
+
+
+route_cache = RouteCache()
+
+def load_route_cache():
+    if ROUTE_CACHE_PATH:
+        print(f"Loaded {route_cache.load(ROUTE_CACHE_PATH)} cached routes from {ROUTE_CACHE_PATH}")
+
+def save_route_cache():
+    if ROUTE_CACHE_PATH:
+        route_cache.save(ROUTE_CACHE_PATH)
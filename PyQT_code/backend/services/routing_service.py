@@ -1,9 +1,53 @@
-import requests
+import asyncio
 import os
 
+# Handle both relative and absolute imports
+try:
+    from ..config import ROUTE_SIMPLIFY_TOLERANCE_M, ROUTE_POLYLINE_PRECISION, ROUTING_ENGINE, ROAD_GRAPH_PATH
+    from . import http_client, polyline
+    from .offline_router import get_road_graph
+    from .route_cache import route_cache
+    from .single_flight import SingleFlight
+    from .simplify import simplify_route_geometry
+except ImportError:
+    from config import ROUTE_SIMPLIFY_TOLERANCE_M, ROUTE_POLYLINE_PRECISION, ROUTING_ENGINE, ROAD_GRAPH_PATH
+    from services import http_client, polyline
+    from services.offline_router import get_road_graph
+    from services.route_cache import route_cache
+    from services.single_flight import SingleFlight
+    from services.simplify import simplify_route_geometry
+
 ORS_API_KEY = os.getenv("ORS_API_KEY")
+# Keyed like the route cache, so requests that would share a cache entry share the fetch too.
+route_flight = SingleFlight("route")
+
+async def get_route(start, end, geometry_format="polyline"):
+    """Route from `start` to `end` ([lat, lng]).
+
+    Geometries come back as encoded polylines (ROUTE_POLYLINE_PRECISION) by default,
+    or as GeoJSON LineStrings with `geometry_format="geojson"`.
+    """
+    key = route_cache.key(start, end)
+    route = route_cache.get(key)
+    if route is None:
+        try:
+            route, ok = await route_flight.do(key, _fetch_and_cache, key, start, end)
+        except http_client.DeadlineExceeded as e:
+            # The shared fetch carries on and fills the cache; this caller falls back now.
+            route, ok = await _fallback_route(start, end, {"code": "Unavailable", "message": str(e)})
+        if not ok:
+            return route
+    return _render_geometry(route, geometry_format)
+
+async def _fetch_and_cache(key, start, end):
+    route, ok = await _fetch_route(start, end)
+    if ok:
+        route_cache.put(key, route)
+    return route, ok
 
-def get_route(start, end):
+async def _fetch_route(start, end):
+    if ROUTING_ENGINE == "local":
+        return await _fetch_local_route(start, end)
     url = "https://api.openrouteservice.org/v2/directions/driving-car"
     headers = {
         "Authorization": ORS_API_KEY,
@@ -12,5 +56,51 @@ def get_route(start, end):
     body = {
         "coordinates": [start[::-1], end[::-1]]
     }
-    response = requests.post(url, headers=headers, json=body)
-    return response.json()
+    try:
+        # Directions requests have no side effects, so hedging them is safe.
+        response = await http_client.post(url, upstream="openrouteservice", hedge=True, headers=headers, json=body)
+    except http_client.UPSTREAM_ERRORS as e:
+        return await _fallback_route(start, end, {"code": "Unavailable", "message": f"Routing service unavailable: {e}"})
+    if response.status_code >= 500:
+        return await _fallback_route(start, end, {"code": "Unavailable",
+                                                  "message": f"Routing service returned {response.status_code}"})
+    route = response.json()
+    if response.status_code != 200:
+        return route, False
+    # ORS sends precision-5 polylines; routes are cached as simplified GeoJSON and encoded per request.
+    for item in route.get("routes") or []:
+        if isinstance(item.get("geometry"), str):
+            item["geometry"] = {"type": "LineString", "coordinates": polyline.decode(item["geometry"])}
+    simplify_route_geometry(route, ROUTE_SIMPLIFY_TOLERANCE_M)
+    return route, True
+
+async def _fallback_route(start, end, error):
+    # ORS is down or too slow: answer from the offline road graph when one is configured.
+    if os.path.exists(ROAD_GRAPH_PATH):
+        return await _fetch_local_route(start, end)
+    return error, False
+
+async def _fetch_local_route(start, end):
+    def solve():
+        graph = get_road_graph()
+        if graph is None:
+            return {"code": "NoGraph", "message": "ROUTING_ENGINE=local but ROAD_GRAPH_PATH does not exist"}
+        return graph.route(start, end)
+    # Graph loading and the A* search are CPU-bound; keep them off the event loop.
+    route = await asyncio.to_thread(solve)
+    if route.get("code") != "Ok":
+        return route, False
+    simplify_route_geometry(route, ROUTE_SIMPLIFY_TOLERANCE_M)
+    return route, True
+
+def _render_geometry(route, geometry_format):
+    if geometry_format == "geojson":
+        return route
+    rendered = dict(route)
+    rendered["routes"] = [
+        {**item, "geometry": polyline.encode(item["geometry"]["coordinates"], ROUTE_POLYLINE_PRECISION)}
+        if isinstance(item.get("geometry"), dict) else item
+        for item in route.get("routes") or []
+    ]
+    rendered["geometryPrecision"] = ROUTE_POLYLINE_PRECISION
+    return rendered
@@ -0,0 +1,63 @@
+import numpy as np
+
+METERS_PER_DEG = 111_320.0
+
+def _project(coords):
+    """[lng, lat] degrees -> local planar metres (equirectangular around the mean latitude)."""
+    coords = np.asarray(coords, dtype=np.float64)
+    scale = np.cos(np.radians(coords[:, 1].mean()))
+    return np.column_stack((coords[:, 0] * METERS_PER_DEG * scale, coords[:, 1] * METERS_PER_DEG))
+
+def douglas_peucker_mask(coords, tolerance_m):
+    """Boolean mask of the points Douglas-Peucker keeps for `coords` ([[lng, lat], ...]).
+
+    Iterative, with the point-to-segment distances of each span computed in one
+    NumPy operation, so long trips do not hit the recursion limit or a Python inner loop.
+    """
+    n = len(coords)
+    keep = np.zeros(n, dtype=bool)
+    if n == 0:
+        return keep
+    keep[0] = keep[-1] = True
+    if n < 3 or tolerance_m <= 0:
+        keep[:] = True
+        return keep
+    xy = _project(coords)
+    stack = [(0, n - 1)]
+    while stack:
+        i, j = stack.pop()
+        if j - i < 2:
+            continue
+        a, b, pts = xy[i], xy[j], xy[i + 1:j]
+        ab = b - a
+        length_sq = ab @ ab
+        if length_sq == 0:
+            dist = np.hypot(*(pts - a).T)
+        else:
+            t = np.clip(((pts - a) @ ab) / length_sq, 0.0, 1.0)
+            dist = np.hypot(*(pts - (a + t[:, None] * ab)).T)
+        k = int(np.argmax(dist))
+        if dist[k] > tolerance_m:
+            k += i + 1
+            keep[k] = True
+            stack.append((i, k))
+            stack.append((k, j))
+    return keep
+
+def simplify_coords(coords, tolerance_m):
+    """Simplified copy of a [[lng, lat], ...] line."""
+    if len(coords) < 3:
+        return list(coords)
+    mask = douglas_peucker_mask(coords, tolerance_m)
+    return [c for c, k in zip(coords, mask) if k]
+
+def simplify_route_geometry(route, tolerance_m):
+    """Simplifies GeoJSON LineStrings in an OSRM (`routes`) or ORS GeoJSON (`features`) response, in place.
+
+    Encoded-polyline geometries are left alone.
+    """
+    for item in (route.get("routes") or []) + (route.get("features") or []):
+        geometry = item.get("geometry")
+        if isinstance(geometry, dict) and geometry.get("type") == "LineString":
+            geometry["coordinates"] = simplify_coords(geometry["coordinates"], tolerance_m)
+    return route
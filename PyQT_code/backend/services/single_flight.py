@@ -0,0 +1,70 @@
+import asyncio
+
+# Handle both relative and absolute imports
+try:
+    from . import deadline
+    from .deadline import DeadlineExceeded
+except ImportError:
+    from services import deadline
+    from services.deadline import DeadlineExceeded
+
+_groups = []
+
+
+class SingleFlight:
+    """Coalesces concurrent calls that share a key into one in-flight call.
+
+    The first caller for a key starts `fn(*args)` as a task; callers arriving while it
+    runs await the same task and get the same result (or exception). Nothing is kept
+    once the task finishes, so this dedupes bursts, not repeated calls over time.
+    The shared call runs outside any request budget (the HTTP client's own timeouts
+    still bound it); each caller waits only as long as its own budget allows and
+    then gets DeadlineExceeded while the call carries on for the others.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self._inflight = {}  # key -> asyncio.Task
+        self.calls = self.coalesced = 0
+        _groups.append(self)
+
+    @property
+    def in_flight(self):
+        return len(self._inflight)
+
+    async def do(self, key, fn, *args):
+        self.calls += 1
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._detached(fn, args))
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._done(key, t))
+        else:
+            self.coalesced += 1
+        # shield: one caller going away must not cancel the call the others are waiting on
+        waiter = asyncio.shield(task)
+        left = deadline.remaining()
+        if left is None:
+            return await waiter
+        try:
+            return await asyncio.wait_for(waiter, max(left, 0))
+        except asyncio.TimeoutError:
+            if task.done():
+                raise  # the call itself timed out
+            raise DeadlineExceeded(f"{self.name} call did not finish within the request budget") from None
+
+    @staticmethod
+    async def _detached(fn, args):
+        # The task would otherwise inherit the first caller's deadline and fail everyone at that time.
+        with deadline.detached():
+            return await fn(*args)
+
+    def _done(self, key, task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            task.exception()  # retrieved, so an error nobody awaited any more is not logged as lost
+
+
+def groups():
+    return list(_groups)
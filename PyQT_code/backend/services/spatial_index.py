@@ -0,0 +1,183 @@
+import numpy as np
+
+# Handle both relative and absolute imports
+try:
+    from .geo import haversine_km, km_to_lat_deg, km_to_lng_deg, grid_cols
+except ImportError:
+    from services.geo import haversine_km, km_to_lat_deg, km_to_lng_deg, grid_cols
+
+
+class GridIndex:
+    """Static point index over a uniform lat/lng grid.
+
+    Points are sorted by grid cell so every cell is one contiguous slice of the
+    arrays (CSR layout); a lookup only touches the cells around the query point.
+    Queries return positions into the *sorted* arrays; `order` maps them back to
+    the caller's original point numbering.
+    """
+
+    def __init__(self, lats, lngs, cell_deg):
+        self.cell_deg = cell_deg
+        self._n_cols = grid_cols(cell_deg)
+        lats = np.asarray(lats, dtype=np.float64)
+        lngs = np.asarray(lngs, dtype=np.float64)
+        keys = self.cell_keys(lats, lngs)
+        self.order = np.argsort(keys, kind="stable")
+        self.lats, self.lngs = lats[self.order], lngs[self.order]
+        self._keys = keys[self.order]
+
+    def __len__(self):
+        return len(self.lats)
+
+    # --- grid helpers ---
+    def _row(self, lat):
+        return np.floor((np.asarray(lat) + 90.0) / self.cell_deg).astype(np.int64)
+
+    def _col(self, lng):
+        return np.floor((np.asarray(lng) + 180.0) / self.cell_deg).astype(np.int64)
+
+    def _cell_key(self, row, col):
+        return row * self._n_cols + col
+
+    def cell_keys(self, lats, lngs):
+        return self._cell_key(self._row(lats), self._col(lngs))
+
+    def candidates(self, keys):
+        """Sorted-array positions of every point in the given cells."""
+        keys = np.unique(keys)
+        starts = np.searchsorted(self._keys, keys, side="left")
+        ends = np.searchsorted(self._keys, keys, side="right")
+        hit = ends > starts
+        if not hit.any():
+            return np.empty(0, dtype=np.int64)
+        return np.concatenate([np.arange(s, e) for s, e in zip(starts[hit], ends[hit])])
+
+    def bbox_keys(self, min_lat, min_lng, max_lat, max_lng):
+        rows, cols = np.meshgrid(np.arange(self._row(min_lat), self._row(max_lat) + 1),
+                                 np.arange(self._col(min_lng), self._col(max_lng) + 1), indexing="ij")
+        return self._cell_key(rows.ravel(), cols.ravel())
+
+    def _ring_keys(self, row, col, r):
+        if r == 0:
+            return np.array([self._cell_key(row, col)])
+        span = np.arange(-r, r + 1)
+        inner = span[1:-1]
+        rows = np.concatenate([np.full(span.size, row - r), np.full(span.size, row + r), row + inner, row + inner])
+        cols = np.concatenate([col + span, col + span, np.full(inner.size, col - r), np.full(inner.size, col + r)])
+        return self._cell_key(rows, cols)
+
+    # --- queries ---
+    def within_radius(self, lat, lng, radius_km, limit=None):
+        """(positions, distances_km) of points within `radius_km`, nearest first."""
+        if not len(self):
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        dlat, dlng = km_to_lat_deg(radius_km), km_to_lng_deg(radius_km, lat)
+        idx = self.candidates(self.bbox_keys(lat - dlat, lng - dlng, lat + dlat, lng + dlng))
+        dist = haversine_km(lat, lng, self.lats[idx], self.lngs[idx])
+        keep = dist <= radius_km
+        idx, dist = idx[keep], dist[keep]
+        order = np.argsort(dist, kind="stable")[:limit]
+        return idx[order], dist[order]
+
+    def nearest(self, lat, lng, k=1, max_km=None):
+        """(positions, distances_km) of the `k` nearest points, optionally capped at `max_km`."""
+        if not len(self):
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        row, col = int(self._row(lat)), int(self._col(lng))
+        # A ring of radius r cells guarantees coverage of r cells in every direction.
+        cell_km = self.cell_deg * 111.32 * max(np.cos(np.radians(min(abs(lat) + self.cell_deg, 89.9))), 1e-6)
+        max_r = max(self._row(90.0) - self._row(-90.0), self._n_cols)
+        if max_km is not None:
+            max_r = min(max_r, int(np.ceil(max_km / cell_km)) + 1)
+        found_idx, found_dist = [], []
+        for r in range(max_r + 1):
+            idx = self.candidates(self._ring_keys(row, col, r))
+            if idx.size:
+                found_idx.append(idx)
+                found_dist.append(haversine_km(lat, lng, self.lats[idx], self.lngs[idx]))
+            total = sum(a.size for a in found_idx)
+            if total >= len(self):
+                break
+            if total >= k:
+                dist = np.concatenate(found_dist)
+                if np.partition(dist, k - 1)[k - 1] <= r * cell_km:
+                    break
+        if not found_idx:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        idx, dist = np.concatenate(found_idx), np.concatenate(found_dist)
+        if max_km is not None:
+            keep = dist <= max_km
+            idx, dist = idx[keep], dist[keep]
+        order = np.argsort(dist, kind="stable")[:k]
+        return idx[order], dist[order]
+
+
+class SegmentIndex:
+    """Polyline segments bucketed on a GridIndex's cells, for corridor queries.
+
+    Every segment is registered in each cell its bounding box touches once grown
+    by `buffer_km`, so a point only needs testing against the segments in its own
+    cell. Distances use a local equirectangular projection per segment, which is
+    accurate to well under a percent at corridor scales.
+    """
+
+    def __init__(self, lats, lngs, grid, buffer_km):
+        self.grid, self.buffer_km = grid, buffer_km
+        lats = np.asarray(lats, dtype=np.float64)
+        lngs = np.asarray(lngs, dtype=np.float64)
+        self.lat0, self.lng0, self.lat1, self.lng1 = lats[:-1], lngs[:-1], lats[1:], lngs[1:]
+        self._kx = 111.32 * np.cos(np.radians((self.lat0 + self.lat1) / 2))  # km per degree of lng
+        self._dx = (self.lng1 - self.lng0) * self._kx
+        self._dy = (self.lat1 - self.lat0) * 110.574
+        self.length_km = np.hypot(self._dx, self._dy)
+        self.start_km = np.concatenate(([0.0], np.cumsum(self.length_km)[:-1]))
+
+        dlat = km_to_lat_deg(buffer_km)
+        dlng = buffer_km / np.maximum(self._kx, 1e-6)
+        r0 = grid._row(np.minimum(self.lat0, self.lat1) - dlat)
+        r1 = grid._row(np.maximum(self.lat0, self.lat1) + dlat)
+        c0 = grid._col(np.minimum(self.lng0, self.lng1) - dlng)
+        c1 = grid._col(np.maximum(self.lng0, self.lng1) + dlng)
+        width = c1 - c0 + 1
+        counts = (r1 - r0 + 1) * width
+        seg = np.repeat(np.arange(len(counts)), counts)
+        offset = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        keys = grid._cell_key(r0[seg] + offset // width[seg], c0[seg] + offset % width[seg])
+        order = np.argsort(keys, kind="stable")
+        self._keys, self._segs = keys[order], seg[order]
+        self.keys = np.unique(self._keys)  # every cell the corridor touches
+
+    def __len__(self):
+        return len(self.length_km)
+
+    def locate(self, lats, lngs):
+        """Per point: (distance_km to the polyline, along_km of the closest position on it).
+
+        Points whose cell holds no segment get inf for both.
+        """
+        lats = np.asarray(lats, dtype=np.float64)
+        lngs = np.asarray(lngs, dtype=np.float64)
+        n = len(lats)
+        dist, along = np.full(n, np.inf), np.full(n, np.inf)
+        keys = self.grid.cell_keys(lats, lngs)
+        starts = np.searchsorted(self._keys, keys, side="left")
+        counts = np.searchsorted(self._keys, keys, side="right") - starts
+        if not counts.any():
+            return dist, along
+        # One row per (point, segment sharing its cell) pair.
+        point = np.repeat(np.arange(n), counts)
+        seg = self._segs[np.repeat(starts, counts) + np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)]
+        px = (lngs[point] - self.lng0[seg]) * self._kx[seg]
+        py = (lats[point] - self.lat0[seg]) * 110.574
+        dx, dy, length = self._dx[seg], self._dy[seg], self.length_km[seg]
+        t = np.clip((px * dx + py * dy) / np.maximum(length * length, 1e-12), 0.0, 1.0)
+        pair_dist = np.hypot(px - t * dx, py - t * dy)
+        pair_along = self.start_km[seg] + t * length
+        # Pairs are grouped by point already: reduce each group to its closest segment.
+        hit = np.flatnonzero(counts)
+        group_start = np.cumsum(counts[hit]) - counts[hit]
+        dist[hit] = np.minimum.reduceat(pair_dist, group_start)
+        closest = np.flatnonzero(pair_dist == dist[point])
+        first = np.unique(point[closest], return_index=True)[1]
+        along[point[closest[first]]] = pair_along[closest[first]]
+        return dist, along
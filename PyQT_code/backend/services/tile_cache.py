@@ -0,0 +1,236 @@
+import asyncio
+import hashlib
+import math
+import os
+import sqlite3
+import threading
+import time
+import numpy as np
+
+# Handle both relative and absolute imports
+try:
+    from ..config import TILE_CACHE_DIR, TILE_CACHE_MAX_BYTES, TILE_REFRESH_S, TILE_STYLES, TILE_SUBDOMAINS
+    from . import http_client
+    from .geo import haversine_km
+    from .single_flight import SingleFlight
+except ImportError:
+    from config import TILE_CACHE_DIR, TILE_CACHE_MAX_BYTES, TILE_REFRESH_S, TILE_STYLES, TILE_SUBDOMAINS
+    from services import http_client
+    from services.geo import haversine_km
+    from services.single_flight import SingleFlight
+
+EARTH_CIRCUMFERENCE_KM = 40075.016686
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS metadata (name TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS tiles (
+    zoom_level INTEGER NOT NULL, tile_column INTEGER NOT NULL, tile_row INTEGER NOT NULL, tile_data BLOB NOT NULL,
+    etag TEXT NOT NULL, size INTEGER NOT NULL, fetched_at REAL NOT NULL, accessed_at REAL NOT NULL,
+    pinned INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (zoom_level, tile_column, tile_row)
+);
+CREATE INDEX IF NOT EXISTS tiles_lru ON tiles (pinned, accessed_at);
+"""
+
+
+class TileUnavailable(Exception):
+    pass
+
+
+class TileStore:
+    """One style's tiles in an MBTiles-layout SQLite file (`metadata` and `tiles` tables, TMS row order).
+
+    Extra columns hold the ETag, fetch and last-access times and a `pinned` flag for
+    prefetched tiles. Once the stored bytes exceed `max_bytes` the least recently
+    used unpinned tiles are evicted. Reads only note the access in memory; the
+    times are written back in batches by the next write.
+    """
+
+    def __init__(self, path, name, max_bytes=TILE_CACHE_MAX_BYTES):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path, self.name, self.max_bytes = path, name, max_bytes
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        self._touched = {}  # (z, col, row) -> last access time not yet written
+        self.hits = self.misses = self.evictions = 0
+        conn = self._conn()
+        with conn:
+            conn.executescript(_SCHEMA)
+            conn.executemany("INSERT OR IGNORE INTO metadata (name, value) VALUES (?, ?)",
+                             [("name", name), ("format", "png"), ("type", "baselayer"), ("version", "1.1")])
+        self.size_bytes = conn.execute("SELECT COALESCE(SUM(size), 0) FROM tiles").fetchone()[0]
+
+    def _conn(self):
+        # One connection per thread: the event loop reads, worker threads write.
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _key(z, x, y):
+        return z, x, (1 << z) - 1 - y  # MBTiles rows count from the south
+
+    def get(self, z, x, y):
+        """(data, etag, fetched_at) or None."""
+        key = self._key(z, x, y)
+        row = self._conn().execute(
+            "SELECT tile_data, etag, fetched_at FROM tiles WHERE zoom_level = ? AND tile_column = ? AND tile_row = ?",
+            key).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._touched[key] = time.time()
+        return row
+
+    def fetched_at(self, z, x, y):
+        row = self._conn().execute(
+            "SELECT fetched_at FROM tiles WHERE zoom_level = ? AND tile_column = ? AND tile_row = ?",
+            self._key(z, x, y)).fetchone()
+        return row[0] if row else None
+
+    def put(self, z, x, y, data, pinned=False):
+        """Stores a tile and returns its ETag. Blocking; call it from a worker thread."""
+        key = self._key(z, x, y)
+        etag = hashlib.sha1(data).hexdigest()[:20]
+        now = time.time()
+        conn = self._conn()
+        with self._write_lock, conn:
+            old = conn.execute("SELECT size FROM tiles WHERE zoom_level = ? AND tile_column = ? AND tile_row = ?",
+                               key).fetchone()
+            conn.execute(
+                "INSERT INTO tiles (zoom_level, tile_column, tile_row, tile_data, etag, size, fetched_at, accessed_at, pinned)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) ON CONFLICT (zoom_level, tile_column, tile_row) DO UPDATE SET"
+                " tile_data = excluded.tile_data, etag = excluded.etag, size = excluded.size,"
+                " fetched_at = excluded.fetched_at, accessed_at = excluded.accessed_at,"
+                " pinned = MAX(tiles.pinned, excluded.pinned)",
+                (*key, data, etag, len(data), now, now, int(pinned)))
+            self.size_bytes += len(data) - (old[0] if old else 0)
+            self._flush_touched(conn)
+            if self.size_bytes > self.max_bytes:
+                self._evict(conn)
+        return etag
+
+    def pin(self, z, x, y):
+        conn = self._conn()
+        with self._write_lock, conn:
+            conn.execute("UPDATE tiles SET pinned = 1 WHERE zoom_level = ? AND tile_column = ? AND tile_row = ?",
+                         self._key(z, x, y))
+
+    def _flush_touched(self, conn):
+        touched, self._touched = self._touched, {}
+        if touched:
+            conn.executemany("UPDATE tiles SET accessed_at = ? WHERE zoom_level = ? AND tile_column = ? AND tile_row = ?",
+                             [(t, *key) for key, t in touched.items()])
+
+    def _evict(self, conn):
+        # Down to 90% so a full cache does not evict on every insert.
+        target = self.max_bytes * 0.9
+        victims, freed = [], 0
+        rows = conn.execute("SELECT zoom_level, tile_column, tile_row, size FROM tiles WHERE pinned = 0 ORDER BY accessed_at")
+        for row in rows:
+            if self.size_bytes - freed <= target:
+                break
+            victims.append(row[:3])
+            freed += row[3]
+        rows.close()
+        # Whatever is still over the target is pinned, prefetched tiles.
+        conn.executemany("DELETE FROM tiles WHERE zoom_level = ? AND tile_column = ? AND tile_row = ?", victims)
+        self.size_bytes -= freed
+        self.evictions += len(victims)
+
+    def stats(self):
+        return {"bytes": self.size_bytes, "max_bytes": self.max_bytes, "hits": self.hits, "misses": self.misses,
+                "evictions": self.evictions}
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+def get_tile_store(style):
+    store = _stores.get(style)
+    if store is None:
+        with _stores_lock:
+            store = _stores.get(style)
+            if store is None:
+                store = _stores[style] = TileStore(os.path.join(TILE_CACHE_DIR, f"{style}.mbtiles"), style)
+    return store
+
+def tile_stores():
+    return dict(_stores)
+
+def tile_url(style, z, x, y):
+    return TILE_STYLES[style].format(s=TILE_SUBDOMAINS[(x + y) % len(TILE_SUBDOMAINS)], z=z, x=x, y=y, r="")
+
+
+tile_flight = SingleFlight("tile")
+_refreshing = set()
+
+async def fetch_and_store(style, z, x, y, pinned=False):
+    """Downloads a tile into the style's store. Returns (data, etag), or None if the upstream has no such tile."""
+    # One breaker per style: the styles come from different servers and fail independently.
+    res = await http_client.get(tile_url(style, z, x, y), upstream=f"tiles_{style}")
+    if res.status_code == 404:
+        return None
+    if res.status_code != 200:
+        raise TileUnavailable(f"{style} tile server returned {res.status_code}")
+    etag = await asyncio.to_thread(get_tile_store(style).put, z, x, y, res.content, pinned)
+    return res.content, etag
+
+async def get_tile(style, z, x, y):
+    """(data, etag) from the disk cache, fetched on a miss. Tiles older than TILE_REFRESH_S are
+    served as they are and refetched in the background, so the map keeps working offline."""
+    # SQLite reads block, so they run in a worker thread like the writes do.
+    store = get_tile_store(style)
+    cached = await asyncio.to_thread(store.get, z, x, y)
+    if cached is None:
+        return await tile_flight.do((style, z, x, y), fetch_and_store, style, z, x, y)
+    data, etag, fetched_at = cached
+    if time.time() - fetched_at > TILE_REFRESH_S:
+        task = asyncio.create_task(_refresh(style, z, x, y))
+        _refreshing.add(task)
+        task.add_done_callback(_refreshing.discard)
+    return data, etag
+
+async def _refresh(style, z, x, y):
+    try:
+        await tile_flight.do((style, z, x, y), fetch_and_store, style, z, x, y)
+    except http_client.UPSTREAM_ERRORS + (TileUnavailable,):
+        pass  # keep serving the stored copy
+
+
+def tile_xy(lats, lngs, z):
+    """Fractional Web Mercator tile coordinates of the points at zoom `z`."""
+    n = 1 << z
+    lat = np.radians(np.clip(np.asarray(lats, dtype=np.float64), -85.0511, 85.0511))
+    x = (np.asarray(lngs, dtype=np.float64) + 180.0) / 360.0 * n
+    y = (1.0 - np.log(np.tan(lat) + 1.0 / np.cos(lat)) / math.pi) / 2.0 * n
+    return np.clip(x, 0, n - 1e-9), np.clip(y, 0, n - 1e-9)
+
+def tiles_in_bbox(min_lat, min_lng, max_lat, max_lng, z):
+    """(x, y) arrays of every tile touching the box at zoom `z`."""
+    x, y = tile_xy([max_lat, min_lat], [min_lng, max_lng], z)
+    xs, ys = np.meshgrid(np.arange(int(x[0]), int(x[1]) + 1), np.arange(int(y[0]), int(y[1]) + 1))
+    return xs.ravel(), ys.ravel()
+
+def tiles_along_route(coordinates, buffer_km, z):
+    """(x, y) arrays of the tiles within about `buffer_km` of a [[lng, lat], ...] route at zoom `z`."""
+    coords = np.asarray(coordinates, dtype=np.float64).reshape(-1, 2)
+    lngs, lats = coords[:, 0], coords[:, 1]
+    tile_km = EARTH_CIRCUMFERENCE_KM * math.cos(math.radians(float(np.mean(lats)))) / (1 << z)
+    # Resample so consecutive points are at most half a tile apart.
+    along = np.concatenate(([0.0], np.cumsum(haversine_km(lats[:-1], lngs[:-1], lats[1:], lngs[1:]))))
+    stations = np.arange(0.0, along[-1] + tile_km / 2, tile_km / 2) if along[-1] > 0 else np.zeros(1)
+    x, y = tile_xy(np.interp(stations, along, lats), np.interp(stations, along, lngs), z)
+    reach = int(math.ceil(buffer_km / tile_km))
+    offsets = np.arange(-reach, reach + 1)
+    xs = (x.astype(np.int64)[:, None, None] + offsets[None, :, None]).repeat(len(offsets), axis=2).ravel()
+    ys = (y.astype(np.int64)[:, None, None] + offsets[None, None, :]).repeat(len(offsets), axis=1).ravel()
+    n = 1 << z
+    keep = (xs >= 0) & (xs < n) & (ys >= 0) & (ys < n)
+    keys = np.unique(xs[keep] * n + ys[keep])
+    return keys // n, keys % n
@@ -0,0 +1,46 @@
+import asyncio
+import time
+
+# Handle both relative and absolute imports
+try:
+    from ..config import ROUTING_ENGINE
+    from ..database import get_engine
+    from .charger_index import get_charger_index
+    from .geocoder import get_geocoder
+    from .offline_router import get_road_graph
+except ImportError:
+    from config import ROUTING_ENGINE
+    from database import get_engine
+    from services.charger_index import get_charger_index
+    from services.geocoder import get_geocoder
+    from services.offline_router import get_road_graph
+
+def _connect_database():
+    # Opens the first connection, which also applies the SQLite pragmas.
+    with get_engine().connect():
+        pass
+
+def _import_parsers():
+    import bs4  # noqa: F401  (weather page parsing)
+
+def _steps():
+    steps = [("database", _connect_database), ("charger index", get_charger_index), ("geocoder", get_geocoder),
+             ("parsers", _import_parsers)]
+    if ROUTING_ENGINE == "local":
+        steps.append(("road graph", get_road_graph))
+    return steps
+
+async def warm_up():
+    """Loads lazily initialised dependencies one by one in worker threads.
+
+    Every step is also safe to trigger on demand, so requests arriving during
+    the warmup simply load what they need themselves.
+    """
+    for name, step in _steps():
+        started = time.perf_counter()
+        try:
+            await asyncio.to_thread(step)
+        except Exception as e:
+            print(f"ERROR: warmup of {name} failed: {e}")
+            continue
+        print(f"Warmed up {name} in {(time.perf_counter() - started) * 1000:.0f} ms")
@@ -0,0 +1,90 @@
+import asyncio
+import time
+
+# Handle both relative and absolute imports
+try:
+    from ..config import WEATHER_URL, WEATHER_TTL_S, WEATHER_MAX_STALE_S
+    from . import http_client
+except ImportError:
+    from config import WEATHER_URL, WEATHER_TTL_S, WEATHER_MAX_STALE_S
+    from services import http_client
+
+# The current conditions live in the "qlook" block near the top of the page.
+_FRAGMENT_MARKERS = (b'id=qlook', b'id="qlook"')
+_FRAGMENT_BYTES = 8192
+
+def _extract(html):
+    # Imported on first parse: BeautifulSoup is only needed once a weather page arrives.
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(html, 'html.parser')
+    temperature = soup.find("div", class_="h2")
+    desc = soup.find("p")
+    if temperature is None or desc is None:
+        return None
+    return {"temperature": temperature.text.strip(), "description": desc.text.strip()}
+
+def parse_weather(html):
+    """Extracts temperature and description, parsing only the quick-look fragment when it can be found."""
+    for marker in _FRAGMENT_MARKERS:
+        start = html.find(marker)
+        if start != -1:
+            result = _extract(html[max(start - 64, 0):start + _FRAGMENT_BYTES])
+            if result is not None:
+                return result
+            break
+    result = _extract(html)
+    if result is None:
+        raise ValueError("weather block not found in page")
+    return result
+
+async def fetch_weather(country, city):
+    response = await http_client.get(WEATHER_URL.format(country=country, city=city), upstream="timeanddate")
+    response.raise_for_status()
+    return parse_weather(response.content)
+
+
+class WeatherCache:
+    """TTL cache with stale-while-revalidate and at most one upstream fetch in flight per key."""
+
+    def __init__(self, fetch=fetch_weather, ttl_s=WEATHER_TTL_S, max_stale_s=WEATHER_MAX_STALE_S):
+        self.fetch, self.ttl_s, self.max_stale_s = fetch, ttl_s, max_stale_s
+        self._entries = {}   # key -> (fetched_at, value)
+        self._inflight = {}  # key -> asyncio.Task
+
+    @property
+    def in_flight(self):
+        return len(self._inflight)
+
+    async def get(self, country, city):
+        key = (country.lower(), city.lower())
+        entry = self._entries.get(key)
+        if entry is not None:
+            age = time.monotonic() - entry[0]
+            if age < self.ttl_s:
+                return entry[1]
+            if age < self.max_stale_s:
+                self._refresh(key)  # serve stale now, refresh in the background
+                return entry[1]
+        # shield: a disconnecting client must not cancel the fetch other callers share
+        return await asyncio.shield(self._refresh(key))
+
+    def _refresh(self, key):
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._load(key))
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._done(key, t))
+        return task
+
+    def _done(self, key, task):
+        self._inflight.pop(key, None)
+        if not task.cancelled() and task.exception() is not None:
+            print(f"ERROR: weather refresh for {key} failed: {task.exception()}")
+
+    async def _load(self, key):
+        value = await self.fetch(*key)
+        self._entries[key] = (time.monotonic(), value)
+        return value
+
+
+weather_cache = WeatherCache()
@@ -0,0 +1,175 @@
+import threading
+import time
+from collections import deque
+from sqlalchemy import insert
+from sqlalchemy.exc import OperationalError
+
+# Handle both relative and absolute imports
+try:
+    from ..config import (HISTORY_BUFFER_CAPACITY, HISTORY_FLUSH_ROWS, HISTORY_FLUSH_INTERVAL_S, HISTORY_DEAD_LETTER_MAX,
+                          HISTORY_RETRY_MAX_S, HISTORY_STOP_TIMEOUT_S)
+    from ..database import SessionLocal
+    from ..models import RouteHistory
+    from .metrics import db_commit_latency
+except ImportError:
+    from config import (HISTORY_BUFFER_CAPACITY, HISTORY_FLUSH_ROWS, HISTORY_FLUSH_INTERVAL_S, HISTORY_DEAD_LETTER_MAX,
+                        HISTORY_RETRY_MAX_S, HISTORY_STOP_TIMEOUT_S)
+    from database import SessionLocal
+    from models import RouteHistory
+    from services.metrics import db_commit_latency
+
+
+class BufferFull(Exception):
+    pass
+
+
+def _transient(error):
+    # Lock contention clears by itself; any other error fails the same way on every retry.
+    return isinstance(error, OperationalError) and any(s in str(error).lower() for s in ("locked", "busy"))
+
+
+class WriteBehindBuffer:
+    """Bounded in-memory queue of rows for one table, flushed by a background thread.
+
+    Rows are written in a single transaction whenever `flush_rows` have accumulated
+    or `flush_interval_s` has passed, whichever comes first. `pending` counts rows
+    accepted but not yet committed, including the batch currently being written.
+    A batch that fails on a locked database is retried whole, after a delay that
+    doubles from `flush_interval_s` up to HISTORY_RETRY_MAX_S; on any other error
+    its rows are written one at a time and the ones that still fail are dropped
+    into `dead_letters`, so one bad row cannot block everything queued behind it.
+    """
+
+    def __init__(self, session_factory, model, capacity=HISTORY_BUFFER_CAPACITY,
+                 flush_rows=HISTORY_FLUSH_ROWS, flush_interval_s=HISTORY_FLUSH_INTERVAL_S):
+        self.session_factory, self.model = session_factory, model
+        self.capacity, self.flush_rows, self.flush_interval_s = capacity, flush_rows, flush_interval_s
+        self._rows = deque()
+        self._cond = threading.Condition()
+        self._in_flight = 0
+        self._thread = None
+        self._stopping = False
+        self.flushed = 0
+        self.failed_flushes = 0
+        self.dropped = 0
+        self._retry_delay_s = 0  # non-zero while backing off from a locked database
+        self.dead_letters = deque(maxlen=HISTORY_DEAD_LETTER_MAX)  # (row, error) of the latest dropped rows
+
+    @property
+    def pending(self):
+        return len(self._rows) + self._in_flight
+
+    def start(self):
+        with self._cond:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name=f"write-behind-{self.model.__tablename__}", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout_s=HISTORY_STOP_TIMEOUT_S):
+        """Stops the flusher and writes out everything still queued, retrying for up to `timeout_s`."""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        give_up = time.monotonic() + timeout_s
+        while self.flush() or self._rows:
+            left = give_up - time.monotonic()
+            if left <= 0:
+                print(f"ERROR: write-behind stopped with {len(self._rows)} rows still unwritten; they are lost")
+                self._rows.clear()
+                break
+            time.sleep(min(self._retry_delay_s, left))
+
+    def put(self, row):
+        self.extend([row])
+
+    def extend(self, rows):
+        """Queues rows without blocking; raises BufferFull if they do not fit."""
+        if self._thread is None:
+            self.start()
+        with self._cond:
+            if self.pending + len(rows) > self.capacity:
+                raise BufferFull(f"{self.pending} rows already pending")
+            self._rows.extend(rows)
+            if len(self._rows) >= self.flush_rows:
+                self._cond.notify()
+
+    def flush(self):
+        with self._cond:
+            if not self._rows:
+                return 0
+            batch = list(self._rows)
+            self._rows.clear()
+            self._in_flight += len(batch)
+        written, retry = 0, []
+        try:
+            self._write(batch)
+            written = len(batch)
+        except Exception as e:
+            self.failed_flushes += 1
+            if _transient(e):
+                print(f"WARNING: write-behind flush of {len(batch)} rows failed ({e}); retrying")
+                retry = batch
+            else:
+                print(f"ERROR: write-behind flush of {len(batch)} rows failed: {e}; writing them one at a time")
+                written, retry = self._write_each(batch)
+        with self._cond:
+            # Rows to retry go back in front to keep their order.
+            self._rows.extendleft(reversed(retry))
+            self._in_flight -= len(batch)
+            self._retry_delay_s = min(max(self._retry_delay_s * 2, self.flush_interval_s), HISTORY_RETRY_MAX_S) if retry else 0
+        self.flushed += written
+        return written
+
+    def _write(self, rows):
+        db = self.session_factory()
+        try:
+            started = time.perf_counter()
+            db.execute(insert(self.model), rows)
+            db.commit()
+            db_commit_latency.observe(time.perf_counter() - started, "write_behind")
+        finally:
+            db.close()
+
+    def _write_each(self, rows):
+        """Writes rows singly; returns (rows written, rows to retry)."""
+        written, dropped = 0, 0
+        for i, row in enumerate(rows):
+            try:
+                self._write([row])
+                written += 1
+            except Exception as e:
+                if _transient(e):
+                    return written, rows[i:]
+                self.dead_letters.append((row, str(e)))
+                dropped += 1
+        if dropped:
+            self.dropped += dropped
+            print(f"ERROR: dropped {dropped} RouteHistory rows that could not be written: {self.dead_letters[-1][1]}")
+        return written, []
+
+    def _run(self):
+        deadline = time.monotonic() + self.flush_interval_s
+        while True:
+            with self._cond:
+                # While backing off from a locked database a full queue does not cut the wait short.
+                while not self._stopping and (self._retry_delay_s or len(self._rows) < self.flush_rows):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                if self._stopping:
+                    return
+            self.flush()
+            deadline = time.monotonic() + (self._retry_delay_s or self.flush_interval_s)
+
+    def stats(self):
+        return {"pending": self.pending, "capacity": self.capacity,
+                "flushed": self.flushed, "failedFlushes": self.failed_flushes, "dropped": self.dropped}
+
+
+history_buffer = WriteBehindBuffer(SessionLocal, RouteHistory)
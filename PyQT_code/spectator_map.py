@@ -8,6 +8,7 @@ from PyQt6.QtWebChannel import QWebChannel
 
 from app import config
 from app.vehicle_state import vehicle_state
+from backend.services import polyline
 
 class SpectatorWindow(QMainWindow):
     def __init__(self):
@@ -69,7 +70,10 @@ class SpectatorWindow(QMainWindow):
 
     @pyqtSlot(object)
     def draw_route(self, geometry):
-        if geometry: self._run_js(f"mapApi.drawRoute({json.dumps(geometry)});")
+        if not geometry: return
+        # Ship the route as an encoded polyline rather than a JSON coordinate array
+        encoded = geometry if isinstance(geometry, str) else polyline.encode(geometry['coordinates'], config.ROUTE_POLYLINE_PRECISION)
+        self._run_js(f"mapApi.drawEncodedRoute({json.dumps(encoded)}, {config.ROUTE_POLYLINE_PRECISION});")
 
     @pyqtSlot()
     def clear_map(self):
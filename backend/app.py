@@ -1,12 +1,11 @@
 from datetime import datetime
 import os
 from typing import Optional
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import FileResponse
 from fastapi.staticfiles import StaticFiles
 import requests
-from bs4 import BeautifulSoup
 from pydantic import BaseModel, Field
 
 app = FastAPI()
@@ -35,17 +34,26 @@ async def serve_map():
     return FileResponse(os.path.join(frontend_dir, "map.html"))
 
 @app.get("/get_weather_info")
-async def get_weather_info(country: str = "India", city: str = "Delhi"):
+def get_weather_info(country: str = "India", city: str = "Delhi"):
+    # The cached, fragment-parsing implementation lives in PyQT_code/backend/services/weather_service.py;
+    # this legacy demo backend only fetches and parses the page directly.
     URL = f"https://www.timeanddate.com/weather/{country}/{city}"   # sample request URL -> http://127.0.0.1:8000/get_weather_info?country=India&city=Delhi
 
-    response = requests.get(URL)
+    try:
+        response = requests.get(URL, timeout=10)
+    except requests.RequestException as e:
+        raise HTTPException(status_code=502, detail=f"Weather lookup failed: {e}")
+    # Imported on first request: BeautifulSoup is only needed once a weather page arrives.
+    from bs4 import BeautifulSoup
     soup = BeautifulSoup(response.content, 'html.parser')
 
     # Find temperature and weather description
-    temperature = soup.find("div", class_="h2").text.strip()
-    desc = soup.find("p").text.strip()
+    temperature = soup.find("div", class_="h2")
+    desc = soup.find("p")
+    if response.status_code != 200 or temperature is None or desc is None:
+        raise HTTPException(status_code=502, detail=f"No weather found for {city}, {country}")
 
-    return {"temperature": temperature, "description": desc}
+    return {"temperature": temperature.text.strip(), "description": desc.text.strip()}
 
 
 class LocationUpdate(BaseModel):
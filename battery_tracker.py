@@ -1,34 +1,170 @@
-import socket
-import re
+"""Logs battery levels reported by Cooja motes over their Serial Socket Servers.
+
+    python battery_tracker.py                                  # localhost:60001
+    python battery_tracker.py localhost:60001 localhost:60002 --log battery_log.txt
+
+Each mote socket is read concurrently and reconnected with backoff when Cooja
+restarts. Input is split on newlines, so a message split across reads or several
+messages in one read are all parsed.
+"""
+import argparse
+import asyncio
 import datetime
+import random
+import re
 
 HOST = 'localhost'  # Cooja's Serial Socket Server host
 PORT = 60001        # Default port
+LOW_BATTERY = 20
+READ_SIZE = 64 * 1024
+MAX_LINE = 64 * 1024       # a line longer than this without a newline is dropped
+RECONNECT_MIN_S = 0.5
+RECONNECT_MAX_S = 30.0
+FLUSH_S = 1.0
+
+BATTERY_RE = re.compile(rb'Battery:\s*(\d+)%')
 
 def extract_battery(message):
-    match = re.search(r'Battery:\s*(\d+)%', message)
+    if isinstance(message, str):
+        message = message.encode('utf-8', 'replace')
+    match = BATTERY_RE.search(message)
     return int(match.group(1)) if match else None
 
+
+class LineFramer:
+    """Splits a byte stream into lines. Partial lines stay in one reused bytearray until their newline arrives."""
+
+    def __init__(self, max_line=MAX_LINE):
+        self.buffer = bytearray()
+        self.max_line = max_line
+        self.dropped = 0
+
+    def feed(self, data):
+        buffer = self.buffer
+        buffer += data
+        lines, start = [], 0
+        end = buffer.find(b'\n')
+        while end >= 0:
+            lines.append(bytes(buffer[start:end]).rstrip(b'\r'))
+            start = end + 1
+            end = buffer.find(b'\n', start)
+        if start:
+            del buffer[:start]  # one shift per read, not one per line
+        if len(buffer) > self.max_line:
+            buffer.clear()
+            self.dropped += 1
+        return lines
+
+    def reset(self):
+        self.buffer.clear()
+
+
+class Timestamps:
+    """Log timestamps, formatted once per second rather than once per line."""
+
+    def __init__(self):
+        self.second, self.text = None, ''
+
+    def now(self):
+        now = datetime.datetime.now().replace(microsecond=0)
+        if now != self.second:
+            self.second, self.text = now, now.strftime("%Y-%m-%d %H:%M:%S")
+        return self.text
+
+
+class Mote:
+    def __init__(self, host, port):
+        self.host, self.port = host, port
+        self.name = f"{host}:{port}"
+        self.framer = LineFramer()
+        self.battery = None
+        self.lines = self.readings = 0
+
+
+class Tracker:
+    def __init__(self, motes, log_file, verbose=False):
+        self.motes = motes
+        self.log_file = log_file
+        self.verbose = verbose
+        self.timestamps = Timestamps()
+
+    def handle(self, mote, lines):
+        stamp = self.timestamps.now()
+        entries = []
+        for line in lines:
+            mote.lines += 1
+            if self.verbose:
+                print(f"{mote.name} received: {line.decode('utf-8', 'replace')}")
+            match = BATTERY_RE.search(line)
+            if match is None:
+                continue
+            level = int(match.group(1))
+            mote.readings += 1
+            entry = f"[{stamp}] {mote.name} Battery: {level}%"
+            if level < LOW_BATTERY:
+                entry += " - Low battery warning!"
+                if mote.battery is None or mote.battery >= LOW_BATTERY:
+                    print(f"{mote.name}: low battery detected ({level}%)! Redirecting to charging station...")
+            mote.battery = level
+            entries.append(entry)
+            if self.verbose:
+                print(entry)
+        if entries:
+            self.log_file.write("\n".join(entries) + "\n")
+
+    async def track(self, mote):
+        delay = RECONNECT_MIN_S
+        while True:
+            try:
+                reader, writer = await asyncio.open_connection(mote.host, mote.port)
+            except OSError as e:
+                print(f"{mote.name}: connect failed ({e}); retrying in {delay:.1f}s")
+                await asyncio.sleep(delay * random.uniform(0.8, 1.2))
+                delay = min(delay * 2, RECONNECT_MAX_S)
+                continue
+            print(f"Connected to {mote.name}! Tracking battery levels...")
+            delay = RECONNECT_MIN_S
+            mote.framer.reset()
+            try:
+                while True:
+                    data = await reader.read(READ_SIZE)
+                    if not data:
+                        break
+                    self.handle(mote, mote.framer.feed(data))
+            except OSError as e:
+                print(f"{mote.name}: connection error ({e})")
+            finally:
+                writer.close()
+            print(f"{mote.name}: disconnected; reconnecting")
+
+    async def flush(self):
+        while True:
+            await asyncio.sleep(FLUSH_S)
+            self.log_file.flush()
+
+    async def run(self):
+        flusher = asyncio.create_task(self.flush())
+        try:
+            await asyncio.gather(*(self.track(mote) for mote in self.motes))
+        finally:
+            flusher.cancel()
+            self.log_file.flush()
+
+
+def parse_mote(text):
+    host, _, port = text.rpartition(':')
+    return Mote(host or HOST, int(port))
+
 def main():
-    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-        print(f"Connecting to {HOST}:{PORT}...")
-        s.connect((HOST, PORT))
-        print("Connected! Tracking battery levels...\n")
-
-        with open("battery_log.txt", "a") as log_file:
-            while True:
-                data = s.recv(1024).decode('utf-8').strip()
-                if data:
-                    print(f"Received: {data}")  # <-- Add this for debugging
-                    battery_level = extract_battery(data)
-                    if battery_level is not None:
-                        timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                        log_entry = f"[{timestamp}] Battery: {battery_level}%"
-                        print(log_entry)
-                        if (battery_level < 20):
-                            log_entry += " - Low battery warning!"
-                            print("Low battery detected! Redirecting to charging station...")
-                        log_file.write(log_entry + "\n")
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("motes", nargs="*", default=[f"{HOST}:{PORT}"], help="host:port of each mote's serial socket")
+    parser.add_argument("--log", default="battery_log.txt")
+    parser.add_argument("--verbose", action="store_true", help="print every received line and reading")
+    args = parser.parse_args()
+    motes = [parse_mote(m) for m in args.motes]
+    print(f"Connecting to {', '.join(m.name for m in motes)}...")
+    with open(args.log, "a") as log_file:
+        asyncio.run(Tracker(motes, log_file, args.verbose).run())
 
 if __name__ == "__main__":
     try: